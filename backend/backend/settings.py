@@ -8,6 +8,8 @@ from pathlib import Path
 import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -58,6 +60,7 @@ INSTALLED_APPS = [
     'cultural_sites',
     'rest_framework_gis',
     'django.contrib.gis',
+    'django.contrib.postgres',
 ]
 
 MIDDLEWARE = [
@@ -86,6 +89,111 @@ REST_FRAMEWORK = {
     ]
 }
 
+# Feature cap per zoom level for `locations/?bbox=...&zoom=...` requests.
+# The highest key <= the requested zoom applies; None disables the cap.
+LOCATION_VIEWPORT_MAX_FEATURES = {
+    0: 200,
+    10: 500,
+    13: 2000,
+    15: None,
+}
+
+# Grid clustering for `clusters/`: cluster radius in pixels and the deepest
+# zoom level that still gets clustered.
+LOCATION_CLUSTER_RADIUS = 60
+LOCATION_CLUSTER_MAX_ZOOM = 16
+
+# Caches
+# Local memory by default. Set REDIS_URL (e.g. redis://localhost:6379/0) to
+# share cached feeds between worker processes; this needs the `redis`
+# package installed.
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Cache alias holding the cached location feeds
+LOCATION_CACHE = 'default'
+LOCATION_FEED_CACHE_TIMEOUT = 60 * 60
+# The dataset version that keys those feeds lives in the database
+# (DatasetVersion), so writes by any process or by the import command reach
+# every worker. Each process rereads it at most this often (seconds).
+LOCATION_VERSION_CHECK_INTERVAL = 1.0
+
+# Rows fetched per server-side cursor round trip by /locations/?stream=1
+LOCATION_STREAM_CHUNK_SIZE = 2000
+
+# Compression levels for the precompressed feed variants. Brotli is only
+# offered when the `brotli` package is installed.
+LOCATION_GZIP_LEVEL = 9
+LOCATION_BROTLI_QUALITY = 9
+# gzip level for per-user bodies compressed on every request
+# (`locations/?include_favorite=1`)
+LOCATION_GZIP_FAST_LEVEL = 5
+
+# How often (seconds) the in-memory autocomplete index checks the dataset
+# version and rebuilds itself
+LOCATION_SUGGEST_VERSION_CHECK_INTERVAL = 1.0
+
+# Lifetime of the per-user favorites cache (kept coherent on every write).
+# Only used with a shared cache (REDIS_URL); with local memory favorites
+# are read from the database, as other workers could not drop stale entries.
+FAVORITES_CACHE_TIMEOUT = 60 * 60
+
+# Cache alias and lifetime for rendered vector tiles (`tiles/{z}/{x}/{y}.mvt`)
+LOCATION_TILE_CACHE = 'default'
+LOCATION_TILE_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Street graph for the in-process router (`route/`): a GeoJSON export of OSM
+# highway ways covering the area, e.g. an Overpass `way[highway]` export of
+# Chemnitz. Without it `route/` answers 503 and the map falls back to OSRM.
+# (cultural_sites/data/sample_streets.geojson is a synthetic grid for the
+# tests, not a street map.)
+ROUTING_GRAPH_FILE = os.environ.get('ROUTING_GRAPH_FILE') or None
+# Hot origin/destination pairs kept in memory, and the speed (m/s) used to
+# turn route length into duration
+ROUTING_CACHE_SIZE = 1024
+ROUTING_SPEED = 8.3
+# Start/end points further than this (meters) from the graph get no route
+ROUTING_MAX_SNAP_DISTANCE = 500
+
+# Largest number of stops accepted by the tour planner (`tour/`)
+TOUR_MAX_STOPS = 200
+
+# Snapshot manifests of the offline bundles (`bundle/`), needed to answer
+# delta requests (`bundle/?since=<snapshot id>`)
+LOCATION_BUNDLE_DIR = os.environ.get('LOCATION_BUNDLE_DIR', str(BASE_DIR / 'bundles'))
+# Manifests kept there; clients with an older snapshot get a full bundle
+LOCATION_BUNDLE_MANIFESTS = 20
+
+# Serve locations/, list/, user-info/ and authenticated/ from the async views
+# in cultural_sites/async_views.py; meant for ASGI deployments (under WSGI
+# every async view pays for its own event loop)
+ASYNC_READ_VIEWS = os.environ.get('ASYNC_READ_VIEWS', '').lower() in ('1', 'true', 'yes')
+
+# Time zone of the OSM opening_hours; open_at values are evaluated in it
+OPENING_HOURS_TIME_ZONE = 'Europe/Berlin'
+
+# Users resolved from the access token are cached per (user id, token jti)
+# for this many seconds; 0 disables the cache. Entries are dropped when the
+# user is saved (e.g. password change) or deleted. Only used with a shared
+# cache (REDIS_URL); with local memory every request loads the user.
+AUTH_USER_CACHE = 'default'
+AUTH_USER_CACHE_TIMEOUT = 60
+# Build a lightweight TokenUser from the token claims on read-only endpoints
+# (authenticated/, clusters/, search/autocomplete/, nearby/, route/) instead
+# of loading the User. Deleted users then keep access until token expiry.
+AUTH_TOKEN_USER_FOR_READS = False
+
 ROOT_URLCONF = 'backend.urls'
 
 TEMPLATES = [
@@ -110,14 +218,72 @@ WSGI_APPLICATION = 'backend.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.contrib.gis.db.backends.postgis',
-        'NAME': 'postgres',
-        'USER': 'postgres',
-        'PASSWORD': '0909',
-        'HOST': 'localhost',
-        'PORT': '5432',
+        'NAME': os.environ.get('DB_NAME', 'postgres'),
+        'USER': os.environ.get('DB_USER', 'postgres'),
+        'PASSWORD': os.environ.get('DB_PASSWORD', '0909'),
+        'HOST': os.environ.get('DB_HOST', 'localhost'),
+        'PORT': os.environ.get('DB_PORT', '5432'),
     }
 }
 
+# How database connections are reused (DB_POOL):
+#   persistent  each worker thread keeps its connection for DB_CONN_MAX_AGE
+#               seconds, checked before reuse (default)
+#   psycopg     Django's psycopg 3 connection pool (psycopg[pool]), sized by
+#               DB_POOL_MIN_SIZE/DB_POOL_MAX_SIZE; connections are checked
+#               when taken from the pool
+#   pgbouncer   for a pgbouncer in transaction pooling mode: persistent
+#               connections to pgbouncer, no server-side cursors (they do
+#               not survive transaction pooling)
+#   none        a new connection per request
+# Persistent connections are not meant for ASGI: async views run their
+# queries in changing threads/contexts, so every context keeps its own
+# connection open. With ASYNC_READ_VIEWS the default is therefore the
+# psycopg pool; don't set DB_POOL=persistent for an ASGI deployment.
+DATABASE_POOL_MODE = os.environ.get('DB_POOL', 'psycopg' if ASYNC_READ_VIEWS else 'persistent')
+if DATABASE_POOL_MODE == 'psycopg':
+    from psycopg_pool import ConnectionPool
+
+    DATABASES['default']['CONN_MAX_AGE'] = 0  # required with pooling
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', 2)),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', 10)),
+            'timeout': float(os.environ.get('DB_POOL_TIMEOUT', 10)),
+            'max_idle': float(os.environ.get('DB_POOL_MAX_IDLE', 600)),
+            'check': ConnectionPool.check_connection,
+        },
+    }
+elif DATABASE_POOL_MODE in ('persistent', 'pgbouncer'):
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.environ.get('DB_CONN_MAX_AGE', 60))
+    DATABASES['default']['CONN_HEALTH_CHECKS'] = True
+    if DATABASE_POOL_MODE == 'pgbouncer':
+        DATABASES['default']['DISABLE_SERVER_SIDE_CURSORS'] = True
+elif DATABASE_POOL_MODE == 'none':
+    DATABASES['default']['CONN_MAX_AGE'] = 0
+else:
+    raise ImproperlyConfigured(f'Unknown DB_POOL {DATABASE_POOL_MODE!r}')
+
+# Read replicas (DB_REPLICA_HOSTS=host[:port],...) become the aliases
+# replica1..N with the settings of default. Map, search and nearby reads use
+# one that has replayed the primary's WAL up to the last location write
+# (rechecked every REPLICA_LAG_CHECK_INTERVAL seconds; requests fall back to the
+# primary when a replica cannot be reached),
+# see cultural_sites/routers.py
+DATABASE_REPLICAS = []
+for index, replica_host in enumerate(filter(None, os.environ.get('DB_REPLICA_HOSTS', '').split(',')), 1):
+    replica_host, _, replica_port = replica_host.strip().partition(':')
+    alias = f'replica{index}'
+    DATABASES[alias] = {
+        **DATABASES['default'],
+        'HOST': replica_host,
+        'PORT': replica_port or DATABASES['default']['PORT'],
+        'TEST': {'MIRROR': 'default'},
+    }
+    DATABASE_REPLICAS.append(alias)
+DATABASE_ROUTERS = ['cultural_sites.routers.ReplicaRouter']
+REPLICA_LAG_CHECK_INTERVAL = 1
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 AUTH_PASSWORD_VALIDATORS = [
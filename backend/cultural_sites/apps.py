@@ -4,3 +4,11 @@ from django.apps import AppConfig
 class CulturalSitesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'cultural_sites'
+
+    def ready(self):
+        # Keep the in-memory indexes in sync with Location writes
+        from . import signals  # noqa: F401
+        from .suggestions import setup_suggestion_index
+
+        # No queries here: the autocomplete index loads its data on first use
+        setup_suggestion_index()
@@ -0,0 +1,111 @@
+"""
+Async variants of the hot read endpoints, for ASGI deployments.
+
+DRF function views are synchronous, so these are plain Django views: they
+authenticate the access token cookie through the async methods of
+``CookiesJWTAuthentication`` and read through the async ORM and cache API,
+so a slow client never holds a worker thread. Bodies and status codes match
+the DRF views they replace; urls.py routes to them when ASYNC_READ_VIEWS is
+set. Writes stay on the DRF views.
+"""
+from functools import wraps
+
+from asgiref.sync import sync_to_async
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from rest_framework.exceptions import APIException, NotAuthenticated
+
+from . import views
+from .authentication import CookiesJWTAuthentication, read_only_authentication_classes
+from .caching import acached_feed
+from .favorites import aget_favorite_ids, aget_favorites
+from .geojson import GeoJSONResponse
+from .routers import replica_reads
+
+
+def api_response(data, status=200):
+    # Encoded like DRF's JSONRenderer, so both view flavours answer byte-identically
+    return GeoJSONResponse(data, status=status)
+
+
+def error_response(exc):
+    data = exc.detail if isinstance(exc.detail, (list, dict)) else {'detail': exc.detail}
+    response = api_response(data, status=exc.status_code)
+    if exc.status_code == 401:
+        response['WWW-Authenticate'] = 'Bearer realm="api"'
+    return response
+
+
+def async_authenticated(authentication_classes=None):
+    """``IsAuthenticated`` for async views: sets ``request.user`` or answers 401."""
+    def decorator(view):
+        @wraps(view)
+        async def wrapper(request, *args, **kwargs):
+            result = None
+            try:
+                for authentication_class in authentication_classes or [CookiesJWTAuthentication]:
+                    result = await authentication_class().aauthenticate(request)
+                    if result is not None:
+                        break
+            except APIException as e:
+                return error_response(e)
+            if result is None:
+                return error_response(NotAuthenticated())
+            request.user, request.auth = result
+            return await view(request, *args, **kwargs)
+        return wrapper
+    return decorator
+
+
+@csrf_exempt
+@require_POST
+@async_authenticated(read_only_authentication_classes())
+async def is_authenticated(request):
+    return api_response({'success': True})
+
+
+@require_GET
+@async_authenticated()
+async def get_logged_in_user(request):
+    user = request.user
+    return api_response({
+        'id': user.id,
+        'username': user.username,
+        'email': user.email,
+        'first_name': user.first_name,
+        'last_name': user.last_name,
+    })
+
+
+@require_GET
+@async_authenticated()
+async def list_favorites(request):
+    return api_response(await aget_favorites(request.user.id))
+
+
+@csrf_exempt
+async def location(request):
+    if request.method != 'GET':
+        # Creating locations stays on the DRF view
+        return await sync_to_async(views.location)(request)
+    return await location_get(request)
+
+
+@async_authenticated()
+@replica_reads
+async def location_get(request):
+    personalize = None
+    if request.GET.get('include_favorite', None) in ('1', 'true'):
+        personalize = views.favorites_overlay(await aget_favorite_ids(request.user.id))
+    return await acached_feed(request, 'locations', lambda: location_feed(request), personalize=personalize)
+
+
+async def location_feed(request):
+    try:
+        rows, viewport, cap = views.location_feed_rows(request.GET)
+    except ValueError as e:
+        return api_response({'error': str(e)}, status=400)
+    rows = [row async for row in rows]
+    data = views.location_feed_data(rows, viewport, cap)
+    # Encoding a large feed is CPU bound, keep it off the event loop
+    return await sync_to_async(GeoJSONResponse, thread_sensitive=False)(data, indexed=data["features"])
@@ -1,4 +1,32 @@
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication, JWTStatelessUserAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .caching import aget_generation, bump_generation, get_generation, is_shared_cache
+
+
+def get_auth_cache():
+    return caches[getattr(settings, 'AUTH_USER_CACHE', 'default')]
+
+
+def user_generation_key(user_id):
+    return f'auth:user:{user_id}:generation'
+
+
+def cached_user_key(user_id, jti):
+    return f'auth:user:{user_id}:{jti}'
+
+
+def invalidate_cached_user(user_id):
+    # A new generation orphans every cached entry of this user, whatever the
+    # jti; only after the commit, so nothing reloads the old row under it
+    cache = get_auth_cache()
+    if is_shared_cache(cache):
+        transaction.on_commit(lambda: bump_generation(cache, user_generation_key(user_id)))
+
 
 class CookiesJWTAuthentication(JWTAuthentication):
     def authenticate(self, request):
@@ -6,10 +34,99 @@ class CookiesJWTAuthentication(JWTAuthentication):
         #return super().authenticate(request)(self)
         if not access_token:
             return None
-        
+
         validated_token=self.get_validated_token(access_token)
         try:
-            user=self.get_user(validated_token)
+            user=self.get_cached_user(validated_token)
         except:
             return None
         return (user, validated_token)
+
+    def get_cached_user(self, validated_token):
+        """
+        ``get_user`` with a short-lived cache keyed by user id and token jti,
+        so repeated requests with the same token skip the ``User`` query.
+        Entries carry the user's generation and are only used while it is
+        current. Only a cache shared by all workers is used, as the
+        invalidation on user writes must reach every worker.
+        """
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+        cache = get_auth_cache()
+        if user_id is None or jti is None or not timeout or not is_shared_cache(cache):
+            return self.get_user(validated_token)
+
+        generation = get_generation(cache, user_generation_key(user_id))
+        key = cached_user_key(user_id, jti)
+        cached = cache.get(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        user = self.get_user(validated_token)
+        cache.set(key, (generation, user), timeout=timeout)
+        return user
+
+    # Async counterparts for the plain Django async views (DRF itself only
+    # calls the sync methods)
+
+    async def aauthenticate(self, request):
+        access_token = request.COOKIES.get('access_token')
+        if not access_token:
+            return None
+
+        validated_token = self.get_validated_token(access_token)
+        try:
+            user = await self.aget_cached_user(validated_token)
+        except Exception:
+            return None
+        return (user, validated_token)
+
+    async def aget_cached_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        jti = validated_token.get(api_settings.JTI_CLAIM)
+        timeout = getattr(settings, 'AUTH_USER_CACHE_TIMEOUT', 60)
+        cache = get_auth_cache()
+        if user_id is None or jti is None or not timeout or not is_shared_cache(cache):
+            return await self.aget_user(validated_token)
+
+        generation = await aget_generation(cache, user_generation_key(user_id))
+        key = cached_user_key(user_id, jti)
+        cached = await cache.aget(key)
+        if cached is not None and cached[0] == generation:
+            return cached[1]
+        user = await self.aget_user(validated_token)
+        await cache.aset(key, (generation, user), timeout=timeout)
+        return user
+
+    async def aget_user(self, validated_token):
+        """``get_user`` on the async ORM."""
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        try:
+            user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed('User not found', code='user_not_found')
+        if not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed('User is inactive', code='user_inactive')
+        return user
+
+
+class CookiesJWTTokenUserAuthentication(CookiesJWTAuthentication, JWTStatelessUserAuthentication):
+    """
+    Cookie authentication that builds a ``TokenUser`` from the token claims
+    instead of loading the ``User``. Only for read-only endpoints that need
+    nothing but the user id: a deleted user keeps access until the access
+    token expires.
+    """
+
+    def get_cached_user(self, validated_token):
+        return JWTStatelessUserAuthentication.get_user(self, validated_token)
+
+    async def aget_cached_user(self, validated_token):
+        return JWTStatelessUserAuthentication.get_user(self, validated_token)
+
+
+# Authentication for the read-only endpoints, see AUTH_TOKEN_USER_FOR_READS
+def read_only_authentication_classes():
+    if getattr(settings, 'AUTH_TOKEN_USER_FOR_READS', False):
+        return [CookiesJWTTokenUserAuthentication]
+    return [CookiesJWTAuthentication]
@@ -0,0 +1,260 @@
+"""
+Compact binary snapshots of all locations for offline clients.
+
+A bundle is a 32 byte header followed by sections, all little-endian::
+
+    header   magic b'CSB1', format version u16, flags u16,
+             snapshot id 8 bytes, base snapshot id 8 bytes (zero unless delta),
+             row count u32, section count u32
+    section  tag 4 bytes, payload length u32, payload padded to 8 bytes
+
+Every payload starts 8-byte aligned, so clients can view the columns as
+typed arrays without copying. Sections:
+
+    IDS   int64[n]   Location ids
+    LON   int32[n]   longitude * 10^7
+    LAT   int32[n]   latitude * 10^7
+    NAME  strings    name of each row ('' when missing)
+    CATS  strings    category code dictionary
+    CATO  uint32[n+1], CATI uint16[]  categories of row i: CATI[CATO[i]:CATO[i+1]]
+    WHLS  strings    wheelchair code dictionary
+    WHLC  uint8[n]   wheelchair code of each row
+    SIDX  uint32 block size, uint32 0, int32[blocks * 4]  bbox per block of rows
+    DELE  int64[]    ids removed since the base snapshot (delta bundles only)
+
+A string table is ``uint32 count, uint32[count + 1] offsets, utf-8 bytes``.
+
+Rows are sorted along a Morton curve, so consecutive rows are close on the
+map and SIDX (min lon, min lat, max lon, max lat of every ``block size``
+rows) works as a one-level R-tree.
+
+The snapshot id is derived from the ids and content hashes of all rows. A
+manifest of those hashes is kept per snapshot in LOCATION_BUNDLE_DIR, so a
+client holding snapshot X can ask for the delta from X: only the added or
+changed rows plus the ids deleted since. Only the LOCATION_BUNDLE_MANIFESTS
+most recent manifests are kept.
+"""
+import hashlib
+import re
+import struct
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+from django.db.models import F, FloatField, Func
+
+from .models import Location
+
+MAGIC = b'CSB1'
+FORMAT_VERSION = 1
+FLAG_SPATIAL_INDEX = 1
+FLAG_DELTA = 2
+
+HEADER = struct.Struct('<4sHH8s8sII')
+SECTION = struct.Struct('<4sI')
+COORD_SCALE = 10 ** 7
+SPATIAL_BLOCK_SIZE = 64
+# Snapshot manifests kept for delta requests
+DEFAULT_KEPT_MANIFESTS = 20
+BUNDLE_CONTENT_TYPE = 'application/vnd.cultural-sites.bundle'
+
+SNAPSHOT_ID = re.compile(r'^[0-9a-f]{16}$')
+
+
+class LocationRows:
+    """The bundle columns of a set of locations, in Morton order."""
+
+    def __init__(self, rows):
+        rows = list(rows)
+        self.ids = np.array([row[0] for row in rows], dtype='<i8')
+        self.lons = np.round(np.array([row[1] for row in rows], dtype=np.float64) * COORD_SCALE).astype('<i4')
+        self.lats = np.round(np.array([row[2] for row in rows], dtype=np.float64) * COORD_SCALE).astype('<i4')
+        self.names = [row[3] or '' for row in rows]
+        self.categories = [row[4] or [] for row in rows]
+        self.wheelchair = [row[5] for row in rows]
+        self.digests = [bytes.fromhex(row[6]) if row[6] else bytes(20) for row in rows]
+
+        order = np.argsort(morton_codes(self.lons, self.lats), kind='stable')
+        self.take(order)
+
+    @classmethod
+    def from_database(cls, locations=None):
+        locations = Location.objects.all() if locations is None else locations
+        rows = locations.annotate(
+            bundle_lon=Func(F('geometry'), function='ST_X', output_field=FloatField()),
+            bundle_lat=Func(F('geometry'), function='ST_Y', output_field=FloatField()),
+        ).values_list('id', 'bundle_lon', 'bundle_lat', 'name', 'categories', 'wheelchair_code', 'content_hash')
+        return cls(rows.order_by('id').iterator(chunk_size=5000))
+
+    def __len__(self):
+        return len(self.ids)
+
+    def take(self, order):
+        self.ids, self.lons, self.lats = self.ids[order], self.lons[order], self.lats[order]
+        for name in ('names', 'categories', 'wheelchair', 'digests'):
+            values = getattr(self, name)
+            setattr(self, name, [values[i] for i in order])
+
+    def subset(self, mask):
+        subset = object.__new__(LocationRows)
+        subset.__dict__.update(self.__dict__)
+        subset.take(np.flatnonzero(mask))
+        return subset
+
+    def manifest(self):
+        """``(ids, digests)`` sorted by id, the input of the snapshot id."""
+        order = np.argsort(self.ids, kind='stable')
+        return self.ids[order], b''.join(self.digests[i] for i in order)
+
+
+def morton_codes(lons, lats):
+    """Interleave the 16 high bits of the normalized coordinates (Z-order curve)."""
+    def spread(values):
+        values = values.astype(np.uint64)
+        values = (values | (values << 8)) & 0x00FF00FF
+        values = (values | (values << 4)) & 0x0F0F0F0F
+        values = (values | (values << 2)) & 0x33333333
+        return (values | (values << 1)) & 0x55555555
+
+    def quantize(values):
+        if not len(values):
+            return values.astype(np.uint64)
+        low, high = int(values.min()), int(values.max())
+        return ((values.astype(np.int64) - low) * 0xFFFF // max(high - low, 1)).astype(np.uint64)
+
+    return spread(quantize(lons)) | (spread(quantize(lats)) << 1)
+
+
+def snapshot_id(ids, digests):
+    return hashlib.sha1(ids.astype('<i8').tobytes() + digests).hexdigest()[:16]
+
+
+def string_table(strings):
+    encoded = [value.encode() for value in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype='<u4')
+    offsets[1:] = np.cumsum([len(value) for value in encoded], dtype=np.int64)
+    return struct.pack('<I', len(encoded)) + offsets.tobytes() + b''.join(encoded)
+
+
+def spatial_index(lons, lats, block_size=SPATIAL_BLOCK_SIZE):
+    boxes = []
+    for start in range(0, len(lons), block_size):
+        block_lons, block_lats = lons[start:start + block_size], lats[start:start + block_size]
+        boxes.append((block_lons.min(), block_lats.min(), block_lons.max(), block_lats.max()))
+    return struct.pack('<II', block_size, 0) + np.array(boxes, dtype='<i4').reshape(-1).tobytes()
+
+
+def encode_bundle(rows, snapshot, base=None, deleted=(), with_spatial_index=True):
+    codes = sorted({code for categories in rows.categories for code in categories})
+    code_index = {code: index for index, code in enumerate(codes)}
+    category_offsets = np.zeros(len(rows) + 1, dtype='<u4')
+    category_offsets[1:] = np.cumsum([len(categories) for categories in rows.categories], dtype=np.int64)
+    category_indexes = np.array(
+        [code_index[code] for categories in rows.categories for code in categories], dtype='<u2'
+    )
+    wheelchair_codes = sorted(set(rows.wheelchair))
+    wheelchair_index = {code: index for index, code in enumerate(wheelchair_codes)}
+
+    sections = [
+        (b'IDS ', rows.ids.tobytes()),
+        (b'LON ', rows.lons.tobytes()),
+        (b'LAT ', rows.lats.tobytes()),
+        (b'NAME', string_table(rows.names)),
+        (b'CATS', string_table(codes)),
+        (b'CATO', category_offsets.tobytes()),
+        (b'CATI', category_indexes.tobytes()),
+        (b'WHLS', string_table(wheelchair_codes)),
+        (b'WHLC', np.array([wheelchair_index[code] for code in rows.wheelchair], dtype=np.uint8).tobytes()),
+    ]
+    flags = 0
+    if with_spatial_index and len(rows):
+        flags |= FLAG_SPATIAL_INDEX
+        sections.append((b'SIDX', spatial_index(rows.lons, rows.lats)))
+    if base is not None:
+        flags |= FLAG_DELTA
+        sections.append((b'DELE', np.array(sorted(deleted), dtype='<i8').tobytes()))
+
+    parts = [HEADER.pack(
+        MAGIC, FORMAT_VERSION, flags, bytes.fromhex(snapshot),
+        bytes.fromhex(base) if base else bytes(8), len(rows), len(sections),
+    )]
+    for tag, payload in sections:
+        parts.append(SECTION.pack(tag, len(payload)))
+        parts.append(payload + bytes(-len(payload) % 8))
+    return b''.join(parts)
+
+
+def bundle_dir():
+    return Path(getattr(settings, 'LOCATION_BUNDLE_DIR', settings.BASE_DIR / 'bundles'))
+
+
+def manifest_path(snapshot):
+    if not SNAPSHOT_ID.match(snapshot):
+        raise ValueError('Invalid snapshot id')
+    return bundle_dir() / f'{snapshot}.manifest'
+
+
+def save_manifest(snapshot, ids, digests):
+    path = manifest_path(snapshot)
+    if path.exists():
+        # Still current: keep it out of the pruning below
+        path.touch()
+        return
+    path.parent.mkdir(parents=True, exist_ok=True)
+    # Written under a temporary name so readers never see a partial manifest
+    tmp_path = path.with_suffix(f'.{id(ids)}.tmp')
+    tmp_path.write_bytes(struct.pack('<I', len(ids)) + ids.astype('<i8').tobytes() + digests)
+    tmp_path.replace(path)
+    prune_manifests()
+
+
+def prune_manifests(keep=None):
+    """
+    Delete all but the ``keep`` (LOCATION_BUNDLE_MANIFESTS) most recently
+    used manifests. Clients holding an older snapshot get a 404 for their
+    delta and fetch a full bundle instead.
+    """
+    keep = getattr(settings, 'LOCATION_BUNDLE_MANIFESTS', DEFAULT_KEPT_MANIFESTS) if keep is None else keep
+    manifests = []
+    for path in bundle_dir().glob('*.manifest'):
+        try:
+            manifests.append((path.stat().st_mtime, path))
+        except FileNotFoundError:  # pruned by another process
+            pass
+    manifests.sort(reverse=True)
+    for _, path in manifests[keep:]:
+        path.unlink(missing_ok=True)
+
+
+def load_manifest(snapshot):
+    """``{id: digest}`` of an earlier snapshot; LookupError if it is not known here."""
+    try:
+        data = manifest_path(snapshot).read_bytes()
+    except FileNotFoundError:
+        raise LookupError(f'Unknown snapshot {snapshot}')
+    count, = struct.unpack_from('<I', data)
+    ids = np.frombuffer(data, dtype='<i8', count=count, offset=4)
+    digests = data[4 + 8 * count:]
+    return {int(location_id): digests[20 * i:20 * i + 20] for i, location_id in enumerate(ids)}
+
+
+def export_bundle(since=None, with_spatial_index=True):
+    """
+    Build the bundle of the current data, or the delta from snapshot
+    ``since``. Returns ``(bundle bytes, snapshot id)``.
+    """
+    rows = LocationRows.from_database()
+    ids, digests = rows.manifest()
+    snapshot = snapshot_id(ids, digests)
+    save_manifest(snapshot, ids, digests)
+    if since is None:
+        return encode_bundle(rows, snapshot, with_spatial_index=with_spatial_index), snapshot
+
+    base = load_manifest(since)
+    changed = np.array(
+        [base.get(int(location_id)) != digest for location_id, digest in zip(rows.ids, rows.digests)],
+        dtype=bool,
+    )
+    deleted = set(base) - set(rows.ids.tolist())
+    delta = rows.subset(changed)
+    return encode_bundle(delta, snapshot, base=since, deleted=deleted, with_spatial_index=False), snapshot
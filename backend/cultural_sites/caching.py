@@ -0,0 +1,265 @@
+import contextvars
+import hashlib
+import time
+import uuid
+from contextlib import contextmanager
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import CharField, F, Func
+from django.db.models.functions import Cast
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import quote_etag
+
+from .compression import FAST_ENCODINGS, choose_encoding, compress_fast, compress_variants
+from .models import DatasetVersion
+
+# Row of DatasetVersion holding the dataset version
+DATASET_VERSION_ID = 1
+
+# Query parameters that change the content of the location feeds
+FEED_PARAMS = ('type', 'search', 'city', 'wheelchair', 'tag', 'open_at', 'bbox', 'zoom')
+# Repeatable and matched case-sensitively
+MULTI_VALUE_PARAMS = ('tag',)
+
+
+def get_location_cache():
+    return caches[getattr(settings, 'LOCATION_CACHE', 'default')]
+
+
+def is_shared_cache(cache):
+    """Whether ``cache`` is seen by all worker processes (not local memory or a dummy)."""
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+def new_generation():
+    return uuid.uuid4().hex
+
+
+def get_generation(cache, key):
+    """
+    Current generation stored under ``key``. Generations are random, so when
+    the key is missing (never bumped, or evicted) a new one starts and no
+    entry tagged with an earlier generation becomes valid again.
+    """
+    generation = cache.get(key)
+    if generation is None:
+        generation = new_generation()
+        if not cache.add(key, generation, timeout=None):
+            # Another worker started one first
+            generation = cache.get(key, generation)
+    return generation
+
+
+async def aget_generation(cache, key):
+    generation = await cache.aget(key)
+    if generation is None:
+        generation = new_generation()
+        if not await cache.aadd(key, generation, timeout=None):
+            generation = await cache.aget(key, generation)
+    return generation
+
+
+def bump_generation(cache, key):
+    """Orphan everything cached under the current generation of ``key``."""
+    cache.set(key, new_generation(), timeout=None)
+
+
+# (checked at, version, WAL position) of the last database read in this process
+_dataset_state = None
+_version_bumps_suppressed = contextvars.ContextVar('version_bumps_suppressed', default=False)
+
+
+def dataset_version_check_interval():
+    return getattr(settings, 'LOCATION_VERSION_CHECK_INTERVAL', 1.0)
+
+
+def dataset_state_query():
+    return DatasetVersion.objects.using(DEFAULT_DB_ALIAS).filter(pk=DATASET_VERSION_ID).values_list('version', 'wal_lsn')
+
+
+def get_dataset_state():
+    """
+    ``(version, wal_lsn)`` of the current dataset, read from the primary at
+    most every LOCATION_VERSION_CHECK_INTERVAL seconds per process.
+    """
+    global _dataset_state
+    now = time.monotonic()
+    if _dataset_state is None or now - _dataset_state[0] >= dataset_version_check_interval():
+        version, wal_lsn = dataset_state_query().first() or (1, '')
+        _dataset_state = (now, version, wal_lsn)
+    return _dataset_state[1:]
+
+
+async def aget_dataset_state():
+    global _dataset_state
+    now = time.monotonic()
+    if _dataset_state is None or now - _dataset_state[0] >= dataset_version_check_interval():
+        version, wal_lsn = await dataset_state_query().afirst() or (1, '')
+        _dataset_state = (now, version, wal_lsn)
+    return _dataset_state[1:]
+
+
+def get_dataset_version():
+    return get_dataset_state()[0]
+
+
+async def aget_dataset_version():
+    return (await aget_dataset_state())[0]
+
+
+def bump_dataset_version():
+    """
+    Invalidate everything derived from the Location table.
+
+    Cached entries are keyed by the dataset version, so moving to a new
+    version makes all of them unreachable; they expire on their own. The
+    version moves once the current transaction commits, so no process can
+    rebuild an entry for the new version from uncommitted data.
+    """
+    if not _version_bumps_suppressed.get():
+        transaction.on_commit(increment_dataset_version)
+
+
+@contextmanager
+def suppress_version_bumps():
+    """
+    Skip ``bump_dataset_version`` inside the block (e.g. the per-row delete
+    signals of a bulk delete); the caller bumps once when it is done.
+    """
+    token = _version_bumps_suppressed.set(True)
+    try:
+        yield
+    finally:
+        _version_bumps_suppressed.reset(token)
+
+
+def increment_dataset_version():
+    global _dataset_state
+    changes = {'version': F('version') + 1}
+    if connections[DEFAULT_DB_ALIAS].vendor == 'postgresql':
+        # Runs after the commit, so this position is past the written data
+        changes['wal_lsn'] = Cast(Func(function='pg_current_wal_insert_lsn', output_field=CharField()), CharField())
+    updated = DatasetVersion.objects.filter(pk=DATASET_VERSION_ID).update(**changes)
+    if not updated:
+        DatasetVersion.objects.get_or_create(pk=DATASET_VERSION_ID, defaults={'version': 2})
+    # This process sees its own writes right away
+    _dataset_state = None
+
+
+def normalize_params(params, names=FEED_PARAMS):
+    # The filters are case-insensitive, so "Museum" and "museum " share an entry
+    normalized = []
+    for name in names:
+        if name in MULTI_VALUE_PARAMS:
+            values = sorted({value.strip() for value in params.getlist(name) if value.strip()})
+            if values:
+                normalized.append((name, tuple(values)))
+            continue
+        value = params.get(name, None)
+        if value:
+            normalized.append((name, value.strip().lower()))
+    return normalized
+
+
+def feed_cache_key(namespace, params, version, variant=''):
+    digest = hashlib.sha1(repr((normalize_params(params), variant)).encode()).hexdigest()
+    return f'feed:{namespace}:{version}:{digest}'
+
+
+def cached_feed(request, namespace, build, variant='', personalize=None):
+    """
+    Serve the GET response produced by ``build()`` from the location cache.
+
+    ``variant`` distinguishes bodies that depend on more than the query
+    parameters (e.g. a snapshot to diff against).
+
+    Only successful responses are cached, together with their gzip/brotli
+    compressed variants, so compression runs once per dataset version rather
+    than once per request. Every representation carries a strong ETag, so
+    clients revalidating with ``If-None-Match`` get a 304 without the body.
+
+    Per-user data is not cached: ``personalize`` is a ``(key, function)``
+    pair, and the response body is ``function(cached body, feature index)``
+    (see ``GeoJSONResponse``), derived from the shared entry on every
+    request. ``key`` identifies the personal data and goes into the ETag.
+    """
+    cache = get_location_cache()
+    key = feed_cache_key(namespace, request.GET, get_dataset_version(), variant)
+    entry = cache.get(key)
+    if entry is None:
+        response = build()
+        if response.status_code != 200:
+            return response
+        entry = feed_entry(response)
+        cache.set(key, entry, timeout=getattr(settings, 'LOCATION_FEED_CACHE_TIMEOUT', 60 * 60))
+    if personalize is not None:
+        return personalized_response(request, entry, *personalize)
+    return entry_response(request, entry)
+
+
+async def acached_feed(request, namespace, build, variant='', personalize=None):
+    """``cached_feed`` for async views; ``build`` is a coroutine function."""
+    cache = get_location_cache()
+    key = feed_cache_key(namespace, request.GET, await aget_dataset_version(), variant)
+    entry = await cache.aget(key)
+    if entry is None:
+        response = await build()
+        if response.status_code != 200:
+            return response
+        # Compression is CPU bound, keep it off the event loop
+        entry = await sync_to_async(feed_entry, thread_sensitive=False)(response)
+        await cache.aset(key, entry, timeout=getattr(settings, 'LOCATION_FEED_CACHE_TIMEOUT', 60 * 60))
+    if personalize is not None:
+        return await sync_to_async(personalized_response, thread_sensitive=False)(request, entry, *personalize)
+    return entry_response(request, entry)
+
+
+def feed_entry(response):
+    return {
+        'body': response.content,
+        'encodings': compress_variants(response.content),
+        'content_type': response['Content-Type'],
+        'digest': hashlib.sha1(response.content).hexdigest(),
+        'feature_index': getattr(response, 'feature_index', None),
+    }
+
+
+def entry_response(request, entry):
+    encoding = choose_encoding(request, entry['encodings'])
+    if encoding:
+        response = HttpResponse(entry['encodings'][encoding], content_type=entry['content_type'])
+        response['Content-Encoding'] = encoding
+        etag = quote_etag(f"{entry['digest']}-{encoding}")
+    else:
+        response = HttpResponse(entry['body'], content_type=entry['content_type'])
+        etag = quote_etag(entry['digest'])
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    # Feeds sit behind authentication: shared caches must not store them
+    response['Cache-Control'] = 'private, no-cache'
+    return get_conditional_response(request, etag=etag, response=response)
+
+
+def personalized_response(request, entry, key, personalize):
+    encoding = choose_encoding(request, FAST_ENCODINGS)
+    digest = hashlib.sha1(f"{entry['digest']}:{key}".encode()).hexdigest()
+    # One strong ETag per representation, as in entry_response
+    etag = quote_etag(f'{digest}-{encoding}' if encoding else digest)
+    response = get_conditional_response(request, etag=etag)
+    if response is None:
+        body = personalize(entry['body'], entry['feature_index'])
+        if encoding:
+            response = HttpResponse(compress_fast(body, encoding), content_type=entry['content_type'])
+            response['Content-Encoding'] = encoding
+        else:
+            response = HttpResponse(body, content_type=entry['content_type'])
+    response['ETag'] = etag
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Cache-Control'] = 'private, no-cache'
+    return response
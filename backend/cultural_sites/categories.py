@@ -0,0 +1,69 @@
+"""
+Category dimension and facet counts.
+
+Every code found in ``Location.categories`` has a ``Category`` row, linked
+to its locations through the many-to-many table. Single saves keep the links
+in sync through the model signals, the importer once per written batch.
+
+Facet counts (per category, wheelchair value and city) are computed for a
+filtered queryset and served through ``cached_feed``, so the ``GROUP BY``
+queries run once per dataset version and filter set, not on every page load.
+"""
+from django.db.models import Count, Min
+
+from .models import Category, Location
+
+CategoryLink = Category.locations.through
+
+
+def get_category_ids(codes):
+    """Return ``{code: category id}``, creating the missing categories."""
+    codes = set(codes)
+    if not codes:
+        return {}
+    Category.objects.bulk_create([Category(code=code) for code in codes], ignore_conflicts=True)
+    return dict(Category.objects.filter(code__in=codes).values_list('code', 'id'))
+
+
+def sync_location_categories(locations):
+    """Replace the category links of saved ``locations`` with their current codes."""
+    locations = [location for location in locations if location.pk is not None]
+    if not locations:
+        return
+    category_ids = get_category_ids(code for location in locations for code in location.categories)
+    CategoryLink.objects.filter(location_id__in=[location.pk for location in locations]).delete()
+    CategoryLink.objects.bulk_create([
+        CategoryLink(location_id=location.pk, category_id=category_ids[code])
+        for location in locations
+        for code in location.categories
+    ])
+
+
+def facet_counts(locations):
+    """Counts of the filtered ``locations`` per category, wheelchair value and city."""
+    location_ids = locations.order_by().values('pk')
+    matching = Location.objects.filter(pk__in=location_ids).order_by()
+
+    categories = (
+        CategoryLink.objects.filter(location_id__in=location_ids)
+        .values('category__code')
+        .annotate(count=Count('location_id'))
+        .order_by('-count', 'category__code')
+    )
+    wheelchair = (
+        matching.values('wheelchair_code')
+        .annotate(count=Count('id'))
+        .order_by('-count', 'wheelchair_code')
+    )
+    cities = (
+        matching.exclude(city_code='')
+        .values('city_code')
+        .annotate(count=Count('id'), name=Min('addr_city'))
+        .order_by('-count', 'city_code')
+    )
+    return {
+        "total": matching.count(),
+        "categories": [{"value": row['category__code'], "count": row['count']} for row in categories],
+        "wheelchair": [{"value": row['wheelchair_code'], "count": row['count']} for row in wheelchair],
+        "city": [{"value": row['city_code'], "name": row['name'], "count": row['count']} for row in cities],
+    }
@@ -0,0 +1,132 @@
+import math
+import threading
+
+from django.conf import settings
+
+from .caching import get_dataset_version
+
+# Cluster radius in screen pixels and tile size used to derive the grid
+DEFAULT_CLUSTER_RADIUS = 60
+TILE_SIZE = 256
+DEFAULT_CLUSTER_MAX_ZOOM = 16
+
+
+def project(lon, lat):
+    """Project WGS84 lon/lat onto the unit Web Mercator square."""
+    x = lon / 360.0 + 0.5
+    sin = math.sin(math.radians(max(min(lat, 85.05112878), -85.05112878)))
+    y = 0.5 - 0.25 * math.log((1 + sin) / (1 - sin)) / math.pi
+    return x, y
+
+
+class ClusterIndex:
+    """
+    Hierarchical grid index over location points.
+
+    Every zoom level from 0 to ``max_zoom`` keeps a dict of grid cells, each
+    holding the point count, the coordinate sums (for the centroid) and the
+    ids of the member points. Adding a point touches exactly one cell per
+    level. An index is built once per dataset version and not changed after
+    it is published, so reads need no lock.
+    """
+
+    def __init__(self, radius=DEFAULT_CLUSTER_RADIUS, max_zoom=DEFAULT_CLUSTER_MAX_ZOOM):
+        # Dataset version the points were loaded at
+        self.version = None
+        self.radius = radius
+        self.max_zoom = max_zoom
+        self.levels = [{} for _ in range(max_zoom + 1)]
+
+    def cells_per_axis(self, zoom):
+        return max(1, int((2 ** zoom) * TILE_SIZE / self.radius))
+
+    def cell_key(self, zoom, x, y):
+        n = self.cells_per_axis(zoom)
+        return min(int(x * n), n - 1), min(int(y * n), n - 1)
+
+    def add(self, location_id, lon, lat):
+        x, y = project(lon, lat)
+        for zoom, cells in enumerate(self.levels):
+            cell = cells.setdefault(self.cell_key(zoom, x, y), [0, 0.0, 0.0, set()])
+            cell[0] += 1
+            cell[1] += lon
+            cell[2] += lat
+            cell[3].add(location_id)
+
+    def clusters(self, zoom, extent=None):
+        """
+        Return ``(lon, lat, count, ids)`` tuples for ``zoom`` inside ``extent``
+        (``(min_lon, min_lat, max_lon, max_lat)``).
+        """
+        zoom = min(zoom, self.max_zoom)
+        cells = self.levels[zoom]
+        if extent is None:
+            selected = cells.values()
+        else:
+            min_x, max_y = project(extent[0], extent[1])
+            max_x, min_y = project(extent[2], extent[3])
+            (x0, y0), (x1, y1) = self.cell_key(zoom, min_x, min_y), self.cell_key(zoom, max_x, max_y)
+            if (x1 - x0 + 1) * (y1 - y0 + 1) < len(cells):
+                selected = [
+                    cells[key]
+                    for key in ((cx, cy) for cx in range(x0, x1 + 1) for cy in range(y0, y1 + 1))
+                    if key in cells
+                ]
+            else:
+                selected = [
+                    cell for (cx, cy), cell in cells.items()
+                    if x0 <= cx <= x1 and y0 <= cy <= y1
+                ]
+        return [
+            (cell[1] / cell[0], cell[2] / cell[0], cell[0], tuple(cell[3]))
+            for cell in selected
+        ]
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_cluster_index():
+    """
+    Return the process-wide index, rebuilt from the database whenever the
+    dataset version has moved on (writes by any process or an import).
+    """
+    global _index
+    version = get_dataset_version()
+    if _index is None or _index.version != version:
+        # One thread rebuilds, the others keep answering from the current index
+        if _index_lock.acquire(blocking=_index is None):
+            try:
+                if _index is None or _index.version != version:
+                    _index = build_cluster_index(version)
+            finally:
+                _index_lock.release()
+    return _index
+
+
+def build_cluster_index(version=None):
+    from .models import Location
+
+    index = ClusterIndex(
+        radius=getattr(settings, 'LOCATION_CLUSTER_RADIUS', DEFAULT_CLUSTER_RADIUS),
+        max_zoom=getattr(settings, 'LOCATION_CLUSTER_MAX_ZOOM', DEFAULT_CLUSTER_MAX_ZOOM),
+    )
+    for location_id, geometry in Location.objects.values_list('id', 'geometry').iterator(chunk_size=2000):
+        index.add(location_id, geometry.x, geometry.y)
+    index.version = version
+    return index
+
+
+def cluster_features(zoom, extent=None):
+    features = []
+    for lon, lat, count, ids in get_cluster_index().clusters(zoom, extent):
+        properties = {'cluster': count > 1, 'point_count': count}
+        if count == 1:
+            properties['id'] = ids[0]
+        features.append({
+            'type': 'Feature',
+            'geometry': {'type': 'Point', 'coordinates': [lon, lat]},
+            'properties': properties,
+        })
+    return features
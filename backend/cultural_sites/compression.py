@@ -0,0 +1,63 @@
+import gzip
+
+from django.conf import settings
+
+try:
+    import brotli
+except ImportError:  # optional, only gzip is offered without it
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 200
+# Encodings offered for bodies built per request
+FAST_ENCODINGS = ('gzip',)
+
+
+def compress_variants(body):
+    """Return ``{encoding: compressed_body}`` for every supported encoding."""
+    variants = {}
+    if len(body) < MIN_COMPRESS_SIZE:
+        return variants
+
+    # These run once per cached body, not per request, so the levels can be
+    # higher than an on-the-fly middleware would use
+    variants['gzip'] = gzip.compress(body, compresslevel=getattr(settings, 'LOCATION_GZIP_LEVEL', 9), mtime=0)
+    if brotli is not None:
+        variants['br'] = brotli.compress(body, quality=getattr(settings, 'LOCATION_BROTLI_QUALITY', 9))
+
+    # Keep only the encodings that actually save bytes
+    return {encoding: data for encoding, data in variants.items() if len(data) < len(body)}
+
+
+def compress_fast(body, encoding):
+    """Compress a body built for a single request, trading ratio for speed."""
+    if encoding != 'gzip':
+        raise ValueError(f'Unsupported encoding {encoding!r}')
+    return gzip.compress(body, compresslevel=getattr(settings, 'LOCATION_GZIP_FAST_LEVEL', 5), mtime=0)
+
+
+def accepted_encodings(header):
+    accepted = set()
+    for part in header.split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = params.strip()
+        if quality.startswith('q='):
+            try:
+                if float(quality[2:]) <= 0:
+                    continue
+            except ValueError:
+                continue
+        accepted.add(coding)
+    return accepted
+
+
+def choose_encoding(request, available):
+    """Pick the best precompressed variant the client accepts, or None."""
+    accepted = accepted_encodings(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+    for encoding in ('br', 'gzip'):
+        if encoding in available and (encoding in accepted or '*' in accepted):
+            return encoding
+    return None
@@ -0,0 +1,120 @@
+"""
+Per-user favorites, cached.
+
+Each user's favorites list lives in the location cache under a key that
+contains the user's favorites generation and the dataset version, so renamed
+or deleted locations never show up stale. Every Favorite write starts a new
+generation once it commits: single writes through the model signals, batch
+writes explicitly (bulk_create sends no signals). That orphans the user's
+entries for every dataset version at once, and a reader that loaded the
+favorites before the write stores them under the old generation, where no
+one looks any more.
+
+Dropping an entry only reaches other workers through a shared cache, so
+with a per-process cache (local memory) favorites are always read from the
+database.
+"""
+from django.conf import settings
+from django.db import transaction
+
+from .caching import (
+    aget_dataset_version, aget_generation, bump_generation, get_dataset_version, get_generation,
+    get_location_cache, is_shared_cache,
+)
+from .models import Favorite, Location
+
+MAX_BATCH_SIZE = 500
+
+
+def favorites_generation_key(user_id):
+    return f'favorites:{user_id}:generation'
+
+
+def favorites_cache_key(user_id, generation, version):
+    return f'favorites:{user_id}:{generation}:{version}'
+
+
+def invalidate_favorites(user_id):
+    cache = get_location_cache()
+    if is_shared_cache(cache):
+        transaction.on_commit(lambda: bump_generation(cache, favorites_generation_key(user_id)))
+
+
+def favorites_query(user_id):
+    return (
+        Favorite.objects.filter(user_id=user_id)
+        .order_by('added_at', 'id')
+        .values_list('location_id', 'location__name', 'location__osm_id')
+    )
+
+
+def get_favorites(user_id):
+    """The user's favorites as ``[{'id', 'name', 'osm_id'}]`` in the order they were added."""
+    cache = get_location_cache()
+    if not is_shared_cache(cache):
+        return load_favorites(user_id)
+    generation = get_generation(cache, favorites_generation_key(user_id))
+    key = favorites_cache_key(user_id, generation, get_dataset_version())
+    favorites = cache.get(key)
+    if favorites is None:
+        favorites = load_favorites(user_id)
+        cache.set(key, favorites, timeout=getattr(settings, 'FAVORITES_CACHE_TIMEOUT', 60 * 60))
+    return favorites
+
+
+def load_favorites(user_id):
+    return [
+        {'id': location_id, 'name': name, 'osm_id': osm_id}
+        for location_id, name, osm_id in favorites_query(user_id)
+    ]
+
+
+async def aget_favorites(user_id):
+    cache = get_location_cache()
+    if not is_shared_cache(cache):
+        return await aload_favorites(user_id)
+    generation = await aget_generation(cache, favorites_generation_key(user_id))
+    key = favorites_cache_key(user_id, generation, await aget_dataset_version())
+    favorites = await cache.aget(key)
+    if favorites is None:
+        favorites = await aload_favorites(user_id)
+        await cache.aset(key, favorites, timeout=getattr(settings, 'FAVORITES_CACHE_TIMEOUT', 60 * 60))
+    return favorites
+
+
+async def aload_favorites(user_id):
+    return [
+        {'id': location_id, 'name': name, 'osm_id': osm_id}
+        async for location_id, name, osm_id in favorites_query(user_id)
+    ]
+
+
+def get_favorite_ids(user_id):
+    return {favorite['id'] for favorite in get_favorites(user_id)}
+
+
+async def aget_favorite_ids(user_id):
+    return {favorite['id'] for favorite in await aget_favorites(user_id)}
+
+
+def add_favorites(user, location_ids):
+    """
+    Favorite all existing ``location_ids`` with one INSERT.
+    Returns ``(added_ids, missing_ids)``.
+    """
+    location_ids = set(location_ids)
+    existing = set(Location.objects.filter(id__in=location_ids).values_list('id', flat=True))
+    added = existing - get_favorite_ids(user.id)
+    Favorite.objects.bulk_create(
+        [Favorite(user=user, location_id=location_id) for location_id in existing],
+        ignore_conflicts=True,
+    )
+    invalidate_favorites(user.id)
+    return sorted(added), sorted(location_ids - existing)
+
+
+def remove_favorites(user, location_ids):
+    """Unfavorite ``location_ids`` with one DELETE; returns the number removed."""
+    removed, _ = Favorite.objects.filter(user=user, location_id__in=set(location_ids)).delete()
+    invalidate_favorites(user.id)
+    return removed
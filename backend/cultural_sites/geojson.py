@@ -0,0 +1,175 @@
+"""
+Bulk GeoJSON output for Location querysets.
+
+``LocationSerializer`` builds a DRF field tree and a GEOS geometry for every
+row. For read-only bulk responses we instead pull plain tuples with the
+coordinates extracted by the database (``ST_X``/``ST_Y``) and assemble the
+same feature dicts directly. The output is byte-identical to rendering
+``LocationSerializer(many=True).data`` with DRF's ``JSONRenderer``.
+"""
+import json
+
+from django.db.models import F, FloatField, Func
+from django.http import HttpResponse
+
+from .models import Location
+from .serializers import LOCATION_INTERNAL_FIELDS
+
+try:
+    import orjson
+except ImportError:  # optional, falls back to the stdlib encoder
+    orjson = None
+
+STREAM_CHUNK_BYTES = 64 * 1024
+# Stands in for the features while the rest of a document is encoded;
+# PostgreSQL text cannot hold NUL, so no location data encodes the same way
+FEATURES_MARKER = '\x00features\x00'
+
+# Same order as LocationSerializer's properties (all fields but id/geometry)
+PROPERTY_FIELDS = tuple(
+    field.attname for field in Location._meta.concrete_fields
+    if field.name not in ('id', 'geometry', *LOCATION_INTERNAL_FIELDS)
+)
+
+
+def feature_values(locations, *extra):
+    """
+    Turn a Location queryset into ``(id, lon, lat, *properties, *extra)``
+    tuples; ``extra`` names annotations to append to each row.
+    """
+    return locations.annotate(
+        geojson_lon=Func(F('geometry'), function='ST_X', output_field=FloatField()),
+        geojson_lat=Func(F('geometry'), function='ST_Y', output_field=FloatField()),
+    ).values_list('id', 'geojson_lon', 'geojson_lat', *PROPERTY_FIELDS, *extra)
+
+
+def build_feature(row, extra=()):
+    properties = dict(zip(PROPERTY_FIELDS, row[3:]))
+    properties.update(zip(extra, row[3 + len(PROPERTY_FIELDS):]))
+    return {
+        "id": row[0],
+        "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [row[1], row[2]]},
+        "properties": properties,
+    }
+
+
+def feature_collection(rows, extra=()):
+    return {
+        "type": "FeatureCollection",
+        "features": [build_feature(row, extra) for row in rows],
+    }
+
+
+def _needs_stdlib_floats(data):
+    # orjson and json disagree on exponent notation (1e-05 vs 0.00001) for
+    # very small magnitudes; coordinates that close to 0 go through json.
+    if data.get("type") == "Feature":
+        return _needs_stdlib_floats({"features": [data]})
+    features = data.get("features", ())
+    if isinstance(features, dict):  # the locations view nests a FeatureCollection
+        return _needs_stdlib_floats(features)
+    for feature in features:
+        for value in feature["geometry"]["coordinates"]:
+            if value and abs(value) < 1e-4:
+                return True
+    return False
+
+
+def dumps(data):
+    """Encode ``data`` exactly like DRF's default ``JSONRenderer``."""
+    return _encode(data, stdlib=orjson is None or _needs_stdlib_floats(data))
+
+
+def _encode(data, stdlib):
+    if stdlib:
+        ret = json.dumps(data, ensure_ascii=False, allow_nan=True, separators=(',', ':'))
+    else:
+        ret = orjson.dumps(data).decode()
+    # JSONRenderer escapes these two so the output is also valid JavaScript
+    ret = ret.replace('\u2028', '\\u2028').replace('\u2029', '\\u2029')
+    return ret.encode()
+
+
+def dumps_indexed(data, collection):
+    """
+    ``dumps(data)`` for ``data`` holding the ``feature_collection`` dict
+    ``collection``, along with its feature index ``(ids, offsets)``: the id of
+    every feature and the offset of the brace closing its properties in the
+    output, for ``add_flag``.
+    """
+    features = collection["features"]
+    collection["features"] = FEATURES_MARKER
+    try:
+        # The stdlib encoder is what JSONRenderer uses
+        head, tail = _encode(data, stdlib=True).split(_encode(FEATURES_MARKER, stdlib=True))
+    finally:
+        collection["features"] = features
+
+    parts = [head, b'[']
+    position = len(head) + 1
+    ids, offsets = [], []
+    for index, feature in enumerate(features):
+        if index:
+            parts.append(b',')
+            position += 1
+        encoded = dumps(feature)
+        parts.append(encoded)
+        position += len(encoded)
+        # Properties are the last member, so a feature ends with "}}"
+        ids.append(feature["id"])
+        offsets.append(position - 2)
+    parts += [b']', tail]
+    return b''.join(parts), (ids, offsets)
+
+
+def add_flag(body, feature_index, name, flagged_ids):
+    """
+    Add the boolean property ``name`` to every feature of the encoded
+    ``body``, true for the ids in ``flagged_ids``. ``feature_index`` comes
+    from ``dumps_indexed``; the body is copied around the insertion points,
+    never decoded. Equals ``dumps`` of the data with the property set.
+    """
+    true, false = (b',' + _encode(name, stdlib=True) + b':' + value for value in (b'true', b'false'))
+    body = memoryview(body)
+    parts = []
+    start = 0
+    for location_id, offset in zip(*feature_index):
+        parts += (body[start:offset], true if location_id in flagged_ids else false)
+        start = offset
+    parts.append(body[start:])
+    return b''.join(parts)
+
+
+def stream_feature_collection(rows, extra=()):
+    """
+    Yield the encoded ``feature_collection(rows)`` in chunks of about
+    STREAM_CHUNK_BYTES; joined they equal ``dumps(feature_collection(rows))``.
+    Pass an ``.iterator()`` so only one batch of rows is held in memory.
+    """
+    buffer = bytearray(b'{"type":"FeatureCollection","features":[')
+    separator = b''
+    for row in rows:
+        buffer += separator
+        buffer += dumps(build_feature(row, extra))
+        separator = b','
+        if len(buffer) >= STREAM_CHUNK_BYTES:
+            yield bytes(buffer)
+            buffer.clear()
+    buffer += b']}'
+    yield bytes(buffer)
+
+
+class GeoJSONResponse(HttpResponse):
+    """
+    ``data`` encoded like DRF would. With ``indexed`` (the feature collection
+    inside ``data``) the response also carries its ``feature_index``.
+    """
+
+    def __init__(self, data, indexed=None, **kwargs):
+        kwargs.setdefault('content_type', 'application/json')
+        if indexed is None:
+            body, self.feature_index = dumps(data), None
+        else:
+            body, self.feature_index = dumps_indexed(data, indexed)
+        super().__init__(body, **kwargs)
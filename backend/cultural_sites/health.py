@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.http import JsonResponse
+from django.views.decorators.cache import never_cache
+from django.views.decorators.http import require_GET
+
+
+# Plain Django view for load balancers and monitoring: no authentication,
+# and answering it must not depend on anything but the database.
+@never_cache
+@require_GET
+def database_health(request):
+    data = {'database': 'ok', 'pool_mode': getattr(settings, 'DATABASE_POOL_MODE', None)}
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute('SELECT 1')
+    except DatabaseError as e:
+        data.update(database='unavailable', error=str(e))
+        return JsonResponse(data, status=503)
+
+    # psycopg_pool counters: pool_size, pool_available, requests_waiting, ...
+    pool = getattr(connection, 'pool', None)
+    if pool is not None:
+        data['pool'] = pool.get_stats()
+    return JsonResponse(data)
@@ -0,0 +1,31 @@
+"""
+Entry point for the import worker processes.
+
+Kept apart from ``importer`` so that a spawned child (the default start
+method on Windows) can import it before Django is set up.
+"""
+
+
+def parse_worker(path_queue, result_queue, batch_size):
+    """
+    Pool process: parse, validate and build Location objects for whole files.
+
+    Sends ``('batch', path, locations, read, skipped)`` messages to the
+    bounded ``result_queue`` and finishes every file with ``('done', path,
+    None)`` or ``('error', path, message)``. A ``None`` path stops the worker.
+    """
+    import django
+
+    # Needed under the spawn start method (Windows); a no-op when forked
+    django.setup()
+    from .importer import iter_location_batches
+
+    while (path := path_queue.get()) is not None:
+        try:
+            with open(path, 'rb') as f:
+                for locations, read, skipped in iter_location_batches(f, batch_size):
+                    result_queue.put(('batch', path, locations, read, skipped))
+        except Exception as e:
+            result_queue.put(('error', path, str(e)))
+        else:
+            result_queue.put(('done', path, None))
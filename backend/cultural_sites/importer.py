@@ -0,0 +1,305 @@
+"""
+Bulk GeoJSON import for Location rows.
+
+Features are parsed one at a time with ``ijson`` so memory stays flat on
+large Overpass exports, and written with multi-row
+``INSERT ... ON CONFLICT (osm_id) DO UPDATE`` statements instead of one
+``update_or_create`` per feature. Features whose content hash matches the
+stored ``Location.content_hash`` are not written at all.
+
+Several files can be parsed in parallel by worker processes; writing always
+happens in one process so batches never contend for the same rows.
+"""
+import multiprocessing
+import queue
+import time
+from itertools import islice
+
+import ijson
+from django.contrib.gis.geos import Point
+from django.db import connections, transaction
+
+from .caching import bump_dataset_version, suppress_version_bumps
+from .categories import sync_location_categories
+from .import_worker import parse_worker
+from .models import Location
+
+# GeoJSON property -> Location field
+PROPERTY_MAP = {
+    'name': 'name',
+    'website': 'website',
+    'operator': 'operator',
+    'tourism': 'tourism',
+    'amenity': 'amenity',
+    'landuse': 'landuse',
+    'wheelchair': 'wheelchair',
+    'wikidata': 'wikidata',
+    'addr:street': 'addr_street',
+    'addr:city': 'addr_city',
+}
+
+# Everything the importer owns; used as the ON CONFLICT update list
+UPDATE_FIELDS = [
+    'geometry', *PROPERTY_MAP.values(),
+    'tags', 'search_text', 'categories', 'city_code', 'wheelchair_code', 'opening_intervals',
+    'content_hash',
+]
+
+
+def iter_features(file_obj):
+    """Yield the features of a FeatureCollection without loading the whole file."""
+    yield from ijson.items(file_obj, 'features.item', use_float=True)
+
+
+def feature_to_location(feature):
+    """Build an unsaved Location from a Point feature, or None if it is unusable."""
+    properties = feature.get('properties') or {}
+    geometry = feature.get('geometry')
+
+    if not geometry or geometry.get('type') != 'Point':
+        return None
+    coords = geometry.get('coordinates')
+    if not coords or len(coords) != 2:
+        return None
+
+    osm_id = str(properties.get('osm_id') or properties.get('@id') or '')
+    if not osm_id:
+        return None
+
+    location = Location(osm_id=osm_id[:100], geometry=Point(coords[0], coords[1], srid=4326))
+    for key, field in PROPERTY_MAP.items():
+        value = properties.get(key)
+        if isinstance(value, str):
+            # Clip to the column size instead of failing the whole batch
+            value = value[:Location._meta.get_field(field).max_length]
+        setattr(location, field, value)
+    # Everything but the Overpass metadata (@id, @geometry, ...)
+    location.tags = {key: value for key, value in properties.items() if not key.startswith('@')}
+    # bulk_create skips save(), so derived columns are filled here
+    location.update_derived_fields()
+    return location
+
+
+def upsert_locations(locations):
+    # A batch must not touch the same osm_id twice in one ON CONFLICT statement
+    unique = {location.osm_id: location for location in locations}
+    Location.objects.bulk_create(
+        unique.values(),
+        update_conflicts=True,
+        unique_fields=['osm_id'],
+        update_fields=UPDATE_FIELDS,
+    )
+    # bulk_create sets the primary keys on PostgreSQL, also for updated rows
+    sync_location_categories(unique.values())
+    return len(unique)
+
+
+def chunked(iterable, size):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+class ImportStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.finished = None
+        self.read = 0
+        self.written = 0
+        self.unchanged = 0
+        self.skipped = 0
+        self.deleted = 0
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.perf_counter()) - self.started
+
+    @property
+    def rate(self):
+        # Features processed per second, unchanged ones included
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+
+def iter_location_batches(file_obj, batch_size):
+    """Yield ``(locations, features_read, features_skipped)`` per ``batch_size`` features."""
+    batch, read, skipped = [], 0, 0
+    for feature in iter_features(file_obj):
+        read += 1
+        location = feature_to_location(feature)
+        if location is None:
+            skipped += 1
+            continue
+        batch.append(location)
+        if len(batch) >= batch_size:
+            yield batch, read, skipped
+            batch, read, skipped = [], 0, 0
+    if batch or read:
+        yield batch, read, skipped
+
+
+class LocationWriter:
+    """
+    Single writer for one import run.
+
+    Takes parsed locations from any number of sources, drops the ones whose
+    content hash is unchanged, and upserts the rest in ``batch_size`` rows,
+    committing every ``transaction_size`` rows. Keeps per-source and overall
+    statistics.
+    """
+
+    def __init__(self, batch_size=1000, transaction_size=10000, on_commit=None):
+        self.batch_size = batch_size
+        self.transaction_size = transaction_size
+        self.on_commit = on_commit
+        self.total = ImportStats()
+        self.files = {}
+        self.errors = {}
+        self.pending = []
+        self.seen = set()
+        # One query for the whole run instead of one lookup per feature
+        self.existing = dict(Location.objects.values_list('osm_id', 'content_hash').iterator(chunk_size=10000))
+
+    def file_stats(self, source):
+        if source not in self.files:
+            self.files[source] = ImportStats()
+        return self.files[source]
+
+    def add(self, source, locations, read, skipped):
+        stats = self.file_stats(source)
+        for counter in (stats, self.total):
+            counter.read += read
+            counter.skipped += skipped
+        for location in locations:
+            self.seen.add(location.osm_id)
+            if self.existing.get(location.osm_id) == location.content_hash:
+                stats.unchanged += 1
+                self.total.unchanged += 1
+                continue
+            self.pending.append((source, location))
+        if len(self.pending) >= self.transaction_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        with transaction.atomic():
+            for chunk in chunked(self.pending, self.batch_size):
+                upsert_locations([location for _, location in chunk])
+        for source, _ in self.pending:
+            self.file_stats(source).written += 1
+        self.total.written += len(self.pending)
+        self.pending = []
+        if self.on_commit:
+            self.on_commit(self.total)
+
+    def file_done(self, source):
+        # Commit what is pending so the per-file counts are final
+        self.flush()
+        self.file_stats(source).finished = time.perf_counter()
+
+    def file_failed(self, source, error):
+        self.errors[source] = error
+        self.file_done(source)
+
+    def delete_missing(self):
+        missing = [osm_id for osm_id in self.existing if osm_id not in self.seen]
+        # delete() still sends the per-row signals, which the cascaded
+        # favorites need; the dataset version is bumped once by close()
+        with suppress_version_bumps():
+            for chunk in chunked(missing, self.batch_size):
+                with transaction.atomic():
+                    deleted = Location.objects.filter(osm_id__in=chunk).delete()[1]
+                self.total.deleted += deleted.get(Location._meta.label, 0)
+
+    def close(self, delete_missing=False):
+        try:
+            self.flush()
+            # A failed file would make all of its rows look "missing"
+            if delete_missing and not self.errors:
+                self.delete_missing()
+        finally:
+            self.total.finished = time.perf_counter()
+            # Bulk writes bypass the model signals
+            if self.total.written or self.total.deleted:
+                locations_bulk_changed()
+
+
+def import_files(paths, workers=1, batch_size=1000, transaction_size=10000, queue_size=None,
+                 delete_missing=False, on_commit=None, on_file_done=None):
+    """
+    Import GeoJSON ``paths`` into Location and return the ``LocationWriter``.
+
+    With ``workers`` > 1 the files are parsed by a pool of processes that feed
+    this process through a bounded queue; this process is the only writer.
+    ``on_file_done(path, stats, error)`` is called as each file completes.
+    """
+    writer = LocationWriter(batch_size=batch_size, transaction_size=transaction_size, on_commit=on_commit)
+
+    def finish(path, error=None):
+        if error is None:
+            writer.file_done(path)
+        else:
+            writer.file_failed(path, error)
+        if on_file_done:
+            on_file_done(path, writer.file_stats(path), error)
+
+    try:
+        if workers <= 1:
+            for path in paths:
+                try:
+                    with open(path, 'rb') as f:
+                        for locations, read, skipped in iter_location_batches(f, batch_size):
+                            writer.add(path, locations, read, skipped)
+                except (OSError, ValueError, ijson.JSONError) as e:
+                    finish(path, str(e))
+                else:
+                    finish(path)
+        else:
+            run_pipeline(writer, paths, workers, batch_size, queue_size or workers * 4, finish)
+    finally:
+        writer.close(delete_missing=delete_missing)
+    return writer
+
+
+def run_pipeline(writer, paths, workers, batch_size, queue_size, finish):
+    # Forked children must not share the parent's database socket
+    connections.close_all()
+
+    path_queue = multiprocessing.Queue()
+    result_queue = multiprocessing.Queue(maxsize=queue_size)
+    for path in paths:
+        path_queue.put(path)
+    workers = min(workers, len(paths))
+    for _ in range(workers):
+        path_queue.put(None)
+
+    processes = [
+        multiprocessing.Process(target=parse_worker, args=(path_queue, result_queue, batch_size), daemon=True)
+        for _ in range(workers)
+    ]
+    for process in processes:
+        process.start()
+
+    try:
+        remaining = len(paths)
+        while remaining:
+            try:
+                kind, path, *payload = result_queue.get(timeout=5)
+            except queue.Empty:
+                if any(process.is_alive() for process in processes) or not result_queue.empty():
+                    continue
+                raise RuntimeError('Import workers exited before finishing all files')
+            if kind == 'batch':
+                writer.add(path, *payload)
+            else:
+                finish(path, payload[0] if kind == 'error' else None)
+                remaining -= 1
+    finally:
+        for process in processes:
+            if process.is_alive():
+                process.terminate()
+            process.join()
+
+
+def locations_bulk_changed():
+    bump_dataset_version()
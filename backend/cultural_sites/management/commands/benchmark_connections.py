@@ -0,0 +1,90 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import close_old_connections, connection
+from django.test import Client
+from rest_framework_simplejwt.tokens import AccessToken
+
+from cultural_sites.models import Location
+
+# Connection settings per mode, applied to the default alias in turn
+MODES = {
+    'none': {'CONN_MAX_AGE': 0},
+    'persistent': {'CONN_MAX_AGE': 600, 'CONN_HEALTH_CHECKS': True},
+    'psycopg': {'CONN_MAX_AGE': 0, 'POOL': {'min_size': 2, 'max_size': 4}},
+}
+BENCH_USERNAME = 'benchmark-connections'
+
+
+class Command(BaseCommand):
+    help = 'Compares favorites endpoint latency with fresh, persistent and pooled database connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=200, help='Requests per endpoint and mode')
+        parser.add_argument('--modes', nargs='+', default=list(MODES), choices=list(MODES))
+
+    def handle(self, *args, **options):
+        location = Location.objects.order_by('id').first()
+        if location is None:
+            raise CommandError('Import some locations first')
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        client = Client(HTTP_HOST=next((host for host in settings.ALLOWED_HOSTS if host != '*'), 'localhost'))
+        client.cookies['access_token'] = str(AccessToken.for_user(user))
+
+        endpoints = [
+            ('POST authenticated/', lambda: client.post('/authenticated/')),
+            ('GET list/', lambda: client.get('/list/')),
+            ('POST add/', lambda: client.post('/add/', {'location_id': location.id}, content_type='application/json')),
+            ('DELETE remove/', lambda: client.delete(f'/remove/{location.id}/')),
+        ]
+
+        original = {
+            key: connection.settings_dict.get(key) for key in ('CONN_MAX_AGE', 'CONN_HEALTH_CHECKS', 'OPTIONS')
+        }
+        original_options = dict(original['OPTIONS'] or {})
+        try:
+            for mode in options['modes']:
+                try:
+                    self.configure(MODES[mode], original_options)
+                except Exception as e:
+                    self.stderr.write(f'{mode}: skipped ({e})')
+                    continue
+                for name, request in endpoints:
+                    p50, p99 = self.measure(request, options['requests'])
+                    self.stdout.write(f'{mode:<11} {name:<20} p50 {p50 * 1000:7.2f} ms | p99 {p99 * 1000:7.2f} ms')
+        finally:
+            self.close()
+            connection.settings_dict.update(original)
+            User.objects.filter(username=BENCH_USERNAME).delete()
+
+    def close(self):
+        connection.close()
+        if (connection.settings_dict.get('OPTIONS') or {}).get('pool'):
+            connection.close_pool()
+
+    def configure(self, mode, original_options):
+        self.close()
+        options = {key: value for key, value in original_options.items() if key != 'pool'}
+        if mode.get('POOL'):
+            options['pool'] = mode['POOL']
+        connection.settings_dict.update(
+            CONN_MAX_AGE=mode.get('CONN_MAX_AGE') or 0,
+            CONN_HEALTH_CHECKS=bool(mode.get('CONN_HEALTH_CHECKS')),
+            OPTIONS=options,
+        )
+        # Connect once so pool creation errors surface here, not in the timings
+        connection.ensure_connection()
+        close_old_connections()
+
+    def measure(self, request, count):
+        timings = []
+        for _ in range(count):
+            start = time.perf_counter()
+            request()
+            # What request_finished does in a real server; the test client skips it
+            close_old_connections()
+            timings.append(time.perf_counter() - start)
+        timings.sort()
+        return timings[len(timings) // 2], timings[min(len(timings) - 1, int(len(timings) * 0.99))]
@@ -0,0 +1,102 @@
+import random
+import re
+import time
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Q
+from django.http import QueryDict
+
+from cultural_sites.models import Location
+from cultural_sites.views import filter_locations
+
+TOURISM = ['museum', 'gallery', 'artwork', 'attraction', 'viewpoint', None]
+AMENITY = ['theatre', 'restaurant', 'cafe', 'fast_food', 'arts_centre', None]
+CITIES = ['Chemnitz', 'Zwickau', 'Freiberg', 'Stollberg', 'Annaberg-Buchholz', None]
+
+# Filter parameters with the queries the old icontains/iexact filters ran
+CASES = [
+    ({'type': 'museum'}, Q(amenity__icontains='museum') | Q(tourism__icontains='museum') | Q(landuse__icontains='museum')),
+    ({'city': 'Freiberg'}, Q(addr_city__iexact='Freiberg')),
+    ({'wheelchair': 'true'}, Q(wheelchair='yes')),
+    ({'type': 'museum', 'wheelchair': 'limited'},
+     (Q(amenity__icontains='museum') | Q(tourism__icontains='museum') | Q(landuse__icontains='museum'))
+     & Q(wheelchair='limited')),
+]
+SCAN_NODE = re.compile(r'((?:Parallel )?(?:Seq|Index|Index Only|Bitmap Heap|Bitmap Index) Scan)')
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compares query plans and latency of the old and the indexed location filters (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000],
+                            help='Synthetic row counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per query, best time is reported')
+        parser.add_argument('--plans', action='store_true', help='Print the full EXPLAIN ANALYZE output')
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    self.benchmark(size, options['repeat'], options['plans'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def benchmark(self, size, repeat, plans):
+        self.create_rows(size)
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE cultural_sites_location')
+
+        self.stdout.write(self.style.MIGRATE_HEADING(f'{size} synthetic rows'))
+        for params, legacy in CASES:
+            label = '&'.join(f'{key}={value}' for key, value in params.items())
+            query = QueryDict(label)
+            for name, locations in (
+                ('before', Location.objects.filter(legacy)),
+                ('after', filter_locations(Location.objects.all(), query)),
+            ):
+                locations = locations.values_list('id', flat=True)
+                # A fresh queryset per run, a reused one would serve its result cache
+                elapsed, count = self.best_of(lambda: len(list(locations.all())), repeat)
+                plan = locations.explain(analyze=True)
+                scans = ', '.join(dict.fromkeys(SCAN_NODE.findall(plan))) or '?'
+                self.stdout.write(
+                    f'  {label:<32} {name:<6} {elapsed * 1000:9.2f} ms | {count:>8} rows | {scans}'
+                )
+                if plans:
+                    self.stdout.write('\n'.join(f'      {line}' for line in plan.splitlines()))
+
+    def create_rows(self, size, batch_size=10000):
+        rng = random.Random(size)
+        for start in range(0, size, batch_size):
+            batch = []
+            for i in range(start, min(start + batch_size, size)):
+                location = Location(
+                    osm_id=f'bench/{i}',
+                    name=f'Site {i}',
+                    tourism=rng.choice(TOURISM),
+                    amenity=rng.choice(AMENITY) if rng.random() < 0.5 else None,
+                    wheelchair=rng.choice(['yes', 'limited', 'no', None, None, None]),
+                    addr_city=rng.choice(CITIES),
+                    geometry=Point(12.85 + rng.random() * 0.2, 50.78 + rng.random() * 0.12, srid=4326),
+                )
+                # bulk_create skips save(), which fills the derived columns
+                location.update_derived_fields()
+                batch.append(location)
+            Location.objects.bulk_create(batch)
+
+    def best_of(self, func, repeat):
+        best, result = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, result
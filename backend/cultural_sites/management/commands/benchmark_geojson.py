@@ -0,0 +1,78 @@
+import random
+import time
+
+from django.contrib.gis.geos import Point
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from cultural_sites.geojson import dumps, feature_collection, feature_values
+from cultural_sites.models import Location
+from cultural_sites.serializers import LocationSerializer
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Compares LocationSerializer against the bulk GeoJSON path on synthetic rows (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', type=int, nargs='+', default=[400, 10000, 100000],
+                            help='Row counts to benchmark')
+        parser.add_argument('--repeat', type=int, default=3, help='Runs per path, best time is reported')
+
+    def handle(self, *args, **options):
+        for size in options['sizes']:
+            try:
+                with transaction.atomic():
+                    self.benchmark(size, options['repeat'])
+                    raise Rollback
+            except Rollback:
+                pass
+
+    def benchmark(self, size, repeat):
+        rng = random.Random(size)
+        Location.objects.bulk_create(
+            [
+                Location(
+                    osm_id=f'bench/{i}',
+                    name=f'Site {i}',
+                    tourism=rng.choice(['museum', 'gallery', 'artwork', None]),
+                    amenity=rng.choice(['theatre', 'restaurant', None]),
+                    wheelchair=rng.choice(['yes', 'limited', 'no', None]),
+                    addr_city='Chemnitz',
+                    geometry=Point(12.85 + rng.random() * 0.2, 50.78 + rng.random() * 0.12, srid=4326),
+                )
+                for i in range(size)
+            ],
+            batch_size=5000,
+        )
+        locations = Location.objects.filter(osm_id__startswith='bench/').order_by('name')
+
+        def drf_path():
+            # A fresh queryset per run, like feature_values() clones it below
+            return JSONRenderer().render(LocationSerializer(locations.all(), many=True).data)
+
+        def fast_path():
+            return dumps(feature_collection(feature_values(locations)))
+
+        drf_time, drf_body = self.best_of(drf_path, repeat)
+        fast_time, fast_body = self.best_of(fast_path, repeat)
+
+        identical = 'identical' if drf_body == fast_body else self.style.ERROR('DIFFERENT')
+        self.stdout.write(
+            f'{size:>7} rows | serializer {drf_time * 1000:9.1f} ms | '
+            f'bulk {fast_time * 1000:9.1f} ms | x{drf_time / fast_time:5.1f} | '
+            f'{len(fast_body) / 1024:8.0f} KiB | output {identical}'
+        )
+
+    def best_of(self, func, repeat):
+        best, body = None, None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            body = func()
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        return best, body
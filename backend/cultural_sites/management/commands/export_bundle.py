@@ -0,0 +1,42 @@
+import gzip
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cultural_sites.bundles import export_bundle
+from cultural_sites.geojson import dumps, feature_collection, feature_values
+from cultural_sites.models import Location
+
+
+class Command(BaseCommand):
+    help = 'Writes a compact binary snapshot (or a delta since an earlier snapshot) of all locations'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--output', type=str, default=None,
+                            help='Bundle file to write (default: <snapshot id>.bundle, or <base>-<snapshot id>.bundle)')
+        parser.add_argument('--since', type=str, default=None,
+                            help='Snapshot id of an earlier bundle; writes only the changes since then')
+        parser.add_argument('--no-spatial-index', action='store_true', help='Leave out the SIDX section')
+        parser.add_argument('--compare', action='store_true',
+                            help='Also report the size of the GeoJSON dump of the same data')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        try:
+            data, snapshot = export_bundle(since=since, with_spatial_index=not options['no_spatial_index'])
+        except (LookupError, ValueError) as e:
+            raise CommandError(str(e))
+
+        output = options['output'] or (f'{since}-{snapshot}.bundle' if since else f'{snapshot}.bundle')
+        with open(output, 'wb') as f:
+            f.write(data)
+        self.stdout.write(self.style.SUCCESS(
+            f'Wrote {output}: snapshot {snapshot}, {len(data) / 1024:.0f} KiB '
+            f'({len(gzip.compress(data)) / 1024:.0f} KiB gzipped)'
+        ))
+
+        if options['compare']:
+            geojson = dumps(feature_collection(feature_values(Location.objects.all())))
+            self.stdout.write(
+                f'GeoJSON dump: {len(geojson) / 1024:.0f} KiB ({len(gzip.compress(geojson)) / 1024:.0f} KiB gzipped), '
+                f'bundle is {len(data) / len(geojson):.1%} of it'
+            )
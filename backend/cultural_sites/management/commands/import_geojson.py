@@ -1,54 +1,79 @@
-import json
-from django.core.management.base import BaseCommand
-from django.contrib.gis.geos import Point
-from cultural_sites.models import Location
+import os
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from cultural_sites.importer import import_files
+
+GEOJSON_SUFFIXES = ('.geojson', '.json')
+
+
+def collect_files(paths):
+    files = []
+    for path in map(Path, paths):
+        if path.is_dir():
+            files.extend(sorted(p for p in path.iterdir() if p.suffix.lower() in GEOJSON_SUFFIXES))
+        else:
+            files.append(path)
+    return [str(path) for path in files]
+
 
 class Command(BaseCommand):
-    help = 'Imports location data from a GeoJSON file into the database'
+    help = 'Imports location data from GeoJSON files (or directories of them) into the database'
 
     def add_arguments(self, parser):
-        parser.add_argument('geojson_file', type=str, help='Path to the GeoJSON file')
+        parser.add_argument('geojson_file', type=str, nargs='+', help='GeoJSON files or directories')
+        parser.add_argument('--workers', type=int, default=min(4, os.cpu_count() or 1),
+                            help='Processes parsing files in parallel (1 parses in this process)')
+        parser.add_argument('--queue-size', type=int, default=None,
+                            help='Parsed batches buffered between the workers and the writer')
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Rows per INSERT ... ON CONFLICT statement')
+        parser.add_argument('--transaction-size', type=int, default=10000,
+                            help='Rows per committed transaction')
+        parser.add_argument('--delete-missing', action='store_true',
+                            help='Delete locations that are in none of the files (and their favorites)')
 
     def handle(self, *args, **options):
-        file_path = options['geojson_file']
-
-        try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-        except Exception as e:
-            self.stderr.write(self.style.ERROR(f"Error reading file: {e}"))
-            return
-
-        count = 0
-        for feature in data.get('features', []):
-            properties = feature.get('properties', {})
-            geometry = feature.get('geometry')
-
-            if geometry and geometry.get('type') == 'Point':
-                coords = geometry.get('coordinates')
-                if not coords or len(coords) != 2:
-                    continue
-
-                osm_id = str(properties.get('osm_id') or properties.get('@id') or '')
-
-                if not osm_id:
-                    continue
-
-                location, created = Location.objects.update_or_create(
-                    osm_id=osm_id,
-                    defaults={
-                        'geometry': Point(coords[0], coords[1]),
-                        'name': properties.get('name'),
-                        'website': properties.get('website'),
-                        'operator': properties.get('operator'),
-                        'tourism': properties.get('tourism'),
-                        'amenity': properties.get('amenity'),
-                        'landuse': properties.get('landuse'),
-                        'wheelchair': properties.get('wheelchair'),
-                        'wikidata': properties.get('wikidata'),
-                    }
-                )
-
-                count += 1
-
-        self.stdout.write(self.style.SUCCESS(f'Successfully imported {count} locations.'))
+        files = collect_files(options['geojson_file'])
+        if not files:
+            raise CommandError('No GeoJSON files found')
+
+        def on_commit(total):
+            self.stdout.write(
+                f'  {total.read} features read, {total.written} rows written '
+                f'({total.rate:,.0f} features/s)'
+            )
+
+        def on_file_done(path, stats, error):
+            if error:
+                self.stderr.write(self.style.ERROR(f'{path}: {error}'))
+                return
+            self.stdout.write(
+                f'{path}: {stats.read} features, {stats.written} written, {stats.unchanged} unchanged, '
+                f'{stats.skipped} skipped in {stats.elapsed:.1f}s ({stats.rate:,.0f} features/s)'
+            )
+
+        writer = import_files(
+            files,
+            workers=options['workers'],
+            batch_size=options['batch_size'],
+            transaction_size=options['transaction_size'],
+            queue_size=options['queue_size'],
+            delete_missing=options['delete_missing'],
+            on_commit=on_commit,
+            on_file_done=on_file_done,
+        )
+
+        total = writer.total
+        summary = (
+            f'Imported {len(files) - len(writer.errors)}/{len(files)} files: {total.written} locations written '
+            f'({total.unchanged} unchanged, {total.skipped} skipped, {total.deleted} deleted) '
+            f'in {total.elapsed:.1f}s, {total.rate:,.0f} features/s.'
+        )
+        if writer.errors:
+            if options['delete_missing']:
+                summary += ' Missing locations were not deleted because some files failed.'
+            self.stdout.write(self.style.WARNING(summary))
+        else:
+            self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,39 @@
+import django.contrib.postgres.indexes
+from django.contrib.postgres.operations import TrigramExtension
+from django.db import migrations, models
+
+from cultural_sites.normalization import normalize_search_text
+
+
+def fill_search_text(apps, schema_editor):
+    Location = apps.get_model('cultural_sites', 'Location')
+    batch = []
+    for location in Location.objects.only('id', 'name', 'addr_street', 'addr_city').iterator(chunk_size=2000):
+        location.search_text = normalize_search_text(location.name, location.addr_street, location.addr_city)
+        batch.append(location)
+        if len(batch) >= 2000:
+            Location.objects.bulk_update(batch, ['search_text'])
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, ['search_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0006_favorite'),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        migrations.AddField(
+            model_name='location',
+            name='search_text',
+            field=models.TextField(blank=True, default='', editable=False),
+        ),
+        migrations.RunPython(fill_search_text, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_text'], name='location_search_trgm', opclasses=['gin_trgm_ops']),
+        ),
+    ]
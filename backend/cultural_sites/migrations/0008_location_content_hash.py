@@ -0,0 +1,17 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0007_location_search_text'),
+    ]
+
+    operations = [
+        # Left empty for existing rows: the next import rewrites them once and fills it
+        migrations.AddField(
+            model_name='location',
+            name='content_hash',
+            field=models.CharField(blank=True, default='', editable=False, max_length=40),
+        ),
+    ]
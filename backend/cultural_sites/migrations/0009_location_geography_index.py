@@ -0,0 +1,17 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0008_location_content_hash'),
+    ]
+
+    operations = [
+        # Expression index for nearest-neighbour (<->) and radius queries in
+        # meters; see cultural_sites/nearby.py for the matching expressions.
+        migrations.RunSQL(
+            'CREATE INDEX location_geography_gist ON cultural_sites_location USING GIST ((geometry::geography));',
+            'DROP INDEX IF EXISTS location_geography_gist;',
+        ),
+    ]
@@ -0,0 +1,20 @@
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0009_location_geography_index'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(
+                django.db.models.functions.comparison.Coalesce('name', models.Value('')),
+                models.F('id'),
+                name='location_name_keyset',
+            ),
+        ),
+    ]
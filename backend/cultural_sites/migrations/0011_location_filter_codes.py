@@ -0,0 +1,61 @@
+import django.contrib.postgres.fields
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+from cultural_sites.normalization import category_codes, normalize_code, normalize_wheelchair
+
+FILTER_CODE_FIELDS = ['categories', 'city_code', 'wheelchair_code']
+
+
+def fill_filter_codes(apps, schema_editor):
+    Location = apps.get_model('cultural_sites', 'Location')
+    batch = []
+    locations = Location.objects.only('id', 'tourism', 'amenity', 'landuse', 'addr_city', 'wheelchair')
+    for location in locations.iterator(chunk_size=2000):
+        location.categories = category_codes(location.tourism, location.amenity, location.landuse)
+        location.city_code = normalize_code(location.addr_city)
+        location.wheelchair_code = normalize_wheelchair(location.wheelchair)
+        batch.append(location)
+        if len(batch) >= 2000:
+            Location.objects.bulk_update(batch, FILTER_CODE_FIELDS)
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, FILTER_CODE_FIELDS)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0010_location_name_keyset'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='categories',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.CharField(max_length=100), blank=True, default=list, editable=False, size=None),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='city_code',
+            field=models.CharField(blank=True, default='', editable=False, max_length=100),
+        ),
+        migrations.AddField(
+            model_name='location',
+            name='wheelchair_code',
+            field=models.CharField(blank=True, default='no', editable=False, max_length=100),
+        ),
+        migrations.RunPython(fill_filter_codes, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['categories'], name='location_categories'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(condition=models.Q(('city_code', ''), _negated=True), fields=['city_code'], name='location_city_code'),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=models.Index(condition=models.Q(('wheelchair_code', 'no'), _negated=True), fields=['wheelchair_code'], name='location_wheelchair_code'),
+        ),
+    ]
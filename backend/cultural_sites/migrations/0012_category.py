@@ -0,0 +1,41 @@
+from django.db import migrations, models
+
+
+def link_categories(apps, schema_editor):
+    Category = apps.get_model('cultural_sites', 'Category')
+    Location = apps.get_model('cultural_sites', 'Location')
+    Link = Category.locations.through
+
+    codes = set()
+    for categories in Location.objects.values_list('categories', flat=True).iterator(chunk_size=2000):
+        codes.update(categories)
+    Category.objects.bulk_create([Category(code=code) for code in sorted(codes)])
+    category_ids = dict(Category.objects.values_list('code', 'id'))
+
+    batch = []
+    for location_id, categories in Location.objects.values_list('id', 'categories').iterator(chunk_size=2000):
+        batch.extend(Link(location_id=location_id, category_id=category_ids[code]) for code in categories)
+        if len(batch) >= 5000:
+            Link.objects.bulk_create(batch)
+            batch = []
+    if batch:
+        Link.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0011_location_filter_codes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Category',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('code', models.CharField(max_length=100, unique=True)),
+                ('locations', models.ManyToManyField(blank=True, related_name='category_set', to='cultural_sites.location')),
+            ],
+        ),
+        migrations.RunPython(link_categories, migrations.RunPython.noop),
+    ]
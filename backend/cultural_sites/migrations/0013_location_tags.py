@@ -0,0 +1,23 @@
+import django.contrib.postgres.indexes
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0012_category'),
+    ]
+
+    operations = [
+        # Left empty for existing rows: tags are part of the content hash now,
+        # so the next import sees every row as changed and fills them
+        migrations.AddField(
+            model_name='location',
+            name='tags',
+            field=models.JSONField(blank=True, default=dict, editable=False),
+        ),
+        migrations.AddIndex(
+            model_name='location',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['tags'], name='location_tags'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+import django.contrib.postgres.fields
+from django.db import migrations, models
+
+from cultural_sites.opening_hours import compile_opening_hours
+
+
+def fill_opening_intervals(apps, schema_editor):
+    Location = apps.get_model('cultural_sites', 'Location')
+    batch = []
+    for location in Location.objects.only('id', 'tags').iterator(chunk_size=2000):
+        location.opening_intervals = compile_opening_hours(location.tags.get('opening_hours'))
+        batch.append(location)
+        if len(batch) >= 2000:
+            Location.objects.bulk_update(batch, ['opening_intervals'])
+            batch = []
+    if batch:
+        Location.objects.bulk_update(batch, ['opening_intervals'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0013_location_tags'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='location',
+            name='opening_intervals',
+            field=django.contrib.postgres.fields.ArrayField(base_field=models.IntegerField(), blank=True, editable=False, null=True, size=None),
+        ),
+        migrations.RunPython(fill_opening_intervals, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+def create_version_row(apps, schema_editor):
+    DatasetVersion = apps.get_model('cultural_sites', 'DatasetVersion')
+    DatasetVersion.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0014_location_opening_intervals'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DatasetVersion',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.PositiveBigIntegerField(default=1)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_version_row, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,16 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cultural_sites', '0015_datasetversion'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='datasetversion',
+            name='wal_lsn',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
@@ -1,5 +1,14 @@
+import hashlib
+import json
+
 from django.contrib.auth.models import User
 from django.contrib.gis.db import models
+from django.contrib.postgres.fields import ArrayField
+from django.contrib.postgres.indexes import GinIndex
+from django.db.models.functions import Coalesce
+
+from .normalization import category_codes, normalize_code, normalize_search_text, normalize_wheelchair
+from .opening_hours import compile_opening_hours
 
 class Location(models.Model):
     osm_id = models.CharField(max_length=100, unique=True)
@@ -14,10 +23,117 @@ class Location(models.Model):
     amenity = models.CharField(max_length=100, blank=True, null=True)
     addr_street = models.CharField(max_length=255, blank=True, null=True)
     addr_city = models.CharField(max_length=100, blank=True, null=True)
+    # Normalized name + address, kept in sync on save; backs the `search` filter
+    search_text = models.TextField(blank=True, default='', editable=False)
+    # Hash of the content fields and geometry; lets re-imports skip unchanged rows
+    content_hash = models.CharField(max_length=40, blank=True, default='', editable=False)
+    # Normalized codes of tourism/amenity/landuse, addr_city and wheelchair;
+    # back the exact-match `type`, `city` and `wheelchair` filters
+    categories = ArrayField(models.CharField(max_length=100), blank=True, default=list, editable=False)
+    city_code = models.CharField(max_length=100, blank=True, default='', editable=False)
+    wheelchair_code = models.CharField(max_length=100, blank=True, default='no', editable=False)
+    # Full OSM tag set from the import, queried with containment (@>) through the GIN index
+    tags = models.JSONField(blank=True, default=dict, editable=False)
+    # tags['opening_hours'] compiled to weekly interval boundaries (see
+    # opening_hours.py); null when missing or not expressible per week
+    opening_intervals = ArrayField(models.IntegerField(), blank=True, null=True, editable=False)
+
+    SEARCH_SOURCE_FIELDS = ('name', 'addr_street', 'addr_city')
+    CATEGORY_SOURCE_FIELDS = ('tourism', 'amenity', 'landuse')
+    CONTENT_FIELDS = (
+        'name', 'website', 'operator', 'tourism', 'wheelchair', 'landuse',
+        'wikidata', 'amenity', 'addr_street', 'addr_city', 'tags',
+    )
+
+    class Meta:
+        indexes = [
+            GinIndex(fields=['search_text'], name='location_search_trgm', opclasses=['gin_trgm_ops']),
+            GinIndex(fields=['categories'], name='location_categories'),
+            GinIndex(fields=['tags'], name='location_tags'),
+            # Partial: half the rows have no city and 'no' is the common case,
+            # neither is selective enough for an index scan
+            models.Index(fields=['city_code'], name='location_city_code', condition=~models.Q(city_code='')),
+            models.Index(
+                fields=['wheelchair_code'], name='location_wheelchair_code',
+                condition=~models.Q(wheelchair_code='no'),
+            ),
+            # Keyset pagination order, see pagination.py
+            models.Index(Coalesce('name', models.Value('')), models.F('id'), name='location_name_keyset'),
+        ]
 
     def __str__(self):
         return self.name or self.osm_id
+
+    def update_search_text(self):
+        self.search_text = normalize_search_text(
+            *(getattr(self, field) for field in self.SEARCH_SOURCE_FIELDS)
+        )
+
+    def update_filter_codes(self):
+        self.categories = category_codes(*(getattr(self, field) for field in self.CATEGORY_SOURCE_FIELDS))
+        self.city_code = normalize_code(self.addr_city)
+        self.wheelchair_code = normalize_wheelchair(self.wheelchair)
+
+    def compute_content_hash(self):
+        content = [getattr(self, field) for field in self.CONTENT_FIELDS]
+        if self.geometry is not None:
+            content += [self.geometry.x, self.geometry.y]
+        return hashlib.sha1(json.dumps(content, ensure_ascii=False, sort_keys=True).encode()).hexdigest()
+
+    def update_derived_fields(self):
+        """Fill the columns computed from other fields; bulk writes must call this."""
+        self.update_search_text()
+        self.update_filter_codes()
+        self.opening_intervals = compile_opening_hours(self.tags.get('opening_hours'))
+        self.content_hash = self.compute_content_hash()
+
+    def save(self, *args, **kwargs):
+        self.update_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            derived = set()
+            if set(update_fields) & set(self.SEARCH_SOURCE_FIELDS):
+                derived.add('search_text')
+            if set(update_fields) & set(self.CATEGORY_SOURCE_FIELDS):
+                derived.add('categories')
+            if 'addr_city' in update_fields:
+                derived.add('city_code')
+            if 'wheelchair' in update_fields:
+                derived.add('wheelchair_code')
+            if 'tags' in update_fields:
+                derived.add('opening_intervals')
+            if set(update_fields) & {*self.CONTENT_FIELDS, 'geometry'}:
+                derived.add('content_hash')
+            kwargs['update_fields'] = {*update_fields, *derived}
+        super().save(*args, **kwargs)
     
+class Category(models.Model):
+    """A normalized category code (see ``Location.categories``) and the locations carrying it."""
+    code = models.CharField(max_length=100, unique=True)
+    locations = models.ManyToManyField(Location, related_name='category_set', blank=True)
+
+    def __str__(self):
+        return self.code
+
+
+class DatasetVersion(models.Model):
+    """
+    Single row counting changes to the Location table.
+
+    Everything derived from locations (cached feeds, tiles, in-memory
+    indexes) is keyed by this version. It lives in the database so every
+    worker process, and the import command, see the same value. ``wal_lsn``
+    is the primary's WAL position when the version moved: a read replica
+    that has replayed up to it holds the data of this version.
+    """
+    version = models.PositiveBigIntegerField(default=1)
+    wal_lsn = models.CharField(max_length=32, blank=True, default='')
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return str(self.version)
+
+
 class Favorite(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     location = models.ForeignKey('Location', on_delete=models.CASCADE)
@@ -0,0 +1,50 @@
+from django.db.models import BooleanField, FloatField
+from django.db.models.expressions import RawSQL
+
+from .models import Location
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+# Both expressions cast the stored geometry to geography exactly like the
+# location_geography_gist index (migration 0009) so PostgreSQL can use it:
+# ``<->`` becomes a KNN index scan, ``ST_DWithin`` an index range scan.
+_POINT = 'ST_SetSRID(ST_MakePoint(%s, %s), 4326)::geography'
+_GEOGRAPHY = f'"{Location._meta.db_table}"."geometry"::geography'
+DISTANCE_SQL = f'{_GEOGRAPHY} <-> {_POINT}'
+WITHIN_SQL = f'ST_DWithin({_GEOGRAPHY}, {_POINT}, %s)'
+
+
+def parse_nearby_params(params):
+    try:
+        lat = float(params['lat'])
+        lon = float(params['lon'])
+    except KeyError:
+        raise ValueError('lat and lon are required')
+    except ValueError:
+        raise ValueError('lat and lon must be numbers')
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('lat/lon out of range')
+
+    try:
+        limit = int(params.get('limit', DEFAULT_LIMIT))
+        radius = params.get('radius', None)
+        radius = float(radius) if radius else None
+    except ValueError:
+        raise ValueError('limit must be an integer and radius a number of meters')
+    if radius is not None and radius <= 0:
+        raise ValueError('radius must be positive')
+
+    return lon, lat, max(1, min(limit, MAX_LIMIT)), radius
+
+
+def nearest_locations(locations, lon, lat, radius=None):
+    """
+    Order ``locations`` by distance to ``lon``/``lat`` and annotate
+    ``distance`` in meters, optionally keeping only those within ``radius``.
+    """
+    if radius is not None:
+        locations = locations.filter(RawSQL(WITHIN_SQL, (lon, lat, radius), output_field=BooleanField()))
+    return locations.annotate(
+        distance=RawSQL(DISTANCE_SQL, (lon, lat), output_field=FloatField())
+    ).order_by('distance')
@@ -0,0 +1,59 @@
+import re
+import unicodedata
+
+# German spellings that should match each other in search
+_REPLACEMENTS = (
+    ('ß', 'ss'),
+    ('ä', 'ae'),
+    ('ö', 'oe'),
+    ('ü', 'ue'),
+)
+_STREET_ABBREVIATION = re.compile(r'str\.(?=\s|$)')
+_WHITESPACE = re.compile(r'\s+')
+
+
+def normalize_search_text(*parts):
+    """
+    Fold text into the form stored in ``Location.search_text``.
+
+    Lowercases, spells out umlauts and ß ("Straße" and "Strasse" both become
+    "strasse"), strips remaining accents and expands the "Str." abbreviation.
+    Queries go through the same function before they are matched.
+    """
+    text = ' '.join(part for part in parts if part).lower()
+    for old, new in _REPLACEMENTS:
+        text = text.replace(old, new)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    text = _STREET_ABBREVIATION.sub('strasse', text)
+    return _WHITESPACE.sub(' ', text).strip()
+
+
+_CODE_SEPARATORS = re.compile(r'[\s_-]+')
+
+
+def normalize_code(value):
+    """
+    Fold a tag value (or a filter parameter) into the exact-match form of the
+    ``Location`` code columns: "Fast Food" and "fast_food" both become
+    "fast_food".
+    """
+    if not value:
+        return ''
+    return _CODE_SEPARATORS.sub('_', normalize_search_text(value)).strip('_')
+
+
+def category_codes(*values):
+    """Codes of all category values; OSM separates multiple values with ';'."""
+    codes = []
+    for value in values:
+        for part in (value or '').split(';'):
+            code = normalize_code(part)
+            if code and code not in codes:
+                codes.append(code)
+    return codes
+
+
+def normalize_wheelchair(value):
+    # A missing tag counts as not accessible, matching the `wheelchair=false` filter
+    return normalize_code(value) or 'no'
@@ -0,0 +1,214 @@
+"""
+OSM ``opening_hours`` compiled into weekly intervals.
+
+The common subset of the grammar is supported: weekday selectors
+(``Mo-Fr``, ``Sa,Su``, wrapping ranges like ``Fr-Mo``), time spans (also past
+midnight and open ended ``+``), ``24/7``, ``off``/``closed``/``open``,
+comments, and ``;`` (overriding) and ``,`` (additional) rules. Public
+holiday selectors are ignored. Strings using anything else (months, dates,
+week numbers, sunrise/sunset, ...) cannot be reduced to one week and compile
+to None, i.e. "unknown".
+
+A compiled schedule is the sorted list of interval boundaries in minutes
+since Monday 00:00, ``[open, close, open, close, ...]`` with closing times
+exclusive. A location is open at minute ``t`` exactly when an odd number of
+boundaries is ``<= t``, which the ``open_at`` filter evaluates in SQL for
+every candidate row without parsing anything per request.
+"""
+import re
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from django.conf import settings
+from django.db.models import BooleanField
+from django.db.models.expressions import RawSQL
+
+DAY_MINUTES = 24 * 60
+WEEK_MINUTES = 7 * DAY_MINUTES
+WEEKDAYS = ('Mo', 'Tu', 'We', 'Th', 'Fr', 'Sa', 'Su')
+STATES = ('open', 'off', 'closed', 'unknown')
+
+_TOKEN = re.compile(r'\s*(?:(\d{1,2}):(\d{2})|(24/7)|([A-Za-z]+)|("[^"]*")|([,\-+]))')
+
+OPEN_AT_SQL = (
+    'mod((SELECT count(*) FROM unnest("{table}"."opening_intervals") AS boundary '
+    'WHERE boundary <= %s), 2) = 1'
+)
+
+
+def tokenize(text):
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN.match(text, pos)
+        if not match:
+            raise ValueError(f'Unsupported opening_hours syntax at {text[pos:]!r}')
+        hours, minutes, always, word, comment, symbol = match.groups()
+        if hours is not None:
+            tokens.append(('time', int(hours) * 60 + int(minutes)))
+        elif always:
+            tokens.append(('always', None))
+        elif word in WEEKDAYS:
+            tokens.append(('day', WEEKDAYS.index(word)))
+        elif word in ('PH', 'SH'):
+            tokens.append(('holiday', word))
+        elif word in STATES:
+            tokens.append(('state', word))
+        elif comment:
+            tokens.append(('comment', comment))
+        elif symbol:
+            tokens.append((symbol, None))
+        else:
+            raise ValueError(f'Unsupported opening_hours selector {word!r}')
+        pos = match.end()
+    return tokens
+
+
+class RuleParser:
+    def __init__(self, tokens):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index][0] if index < len(self.tokens) else None
+
+    def take(self, kind):
+        if self.peek() != kind:
+            raise ValueError(f'Expected {kind} in opening_hours')
+        value = self.tokens[self.pos][1]
+        self.pos += 1
+        return value
+
+    def parse_days(self):
+        """Weekdays selected by the rule, None without a weekday selector."""
+        if self.peek() == 'always':
+            self.pos += 1
+            return set(range(7)), [(0, DAY_MINUTES)]
+        days, selector = set(), False
+        while self.peek() in ('day', 'holiday'):
+            selector = True
+            if self.peek() == 'holiday':
+                # Holidays are not known here, the rule keeps its weekdays
+                self.pos += 1
+            else:
+                first = self.take('day')
+                last = first
+                if self.peek() == '-':
+                    self.pos += 1
+                    last = self.take('day')
+                days.update((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+            if self.peek() == ',' and self.peek(1) in ('day', 'holiday'):
+                self.pos += 1
+            else:
+                break
+        return (days if selector else None), None
+
+    def parse_times(self):
+        times = []
+        while self.peek() == 'time':
+            start = self.take('time')
+            if self.peek() == '-':
+                self.pos += 1
+                end = self.take('time')
+                if end <= start:
+                    end += DAY_MINUTES  # past midnight
+                if self.peek() == '+':
+                    self.pos += 1
+            else:
+                self.take('+')
+                end = DAY_MINUTES  # open end: until midnight
+            times.append((start, end))
+            if self.peek() == ',' and self.peek(1) == 'time':
+                self.pos += 1
+            else:
+                break
+        return times
+
+    def parse(self):
+        """Return ``[(days, times, state)]``; the first is the normal rule, the rest additional."""
+        rules = []
+        while self.peek() is not None:
+            days, times = self.parse_days()
+            times = times or self.parse_times()
+            state = self.take('state') if self.peek() == 'state' else None
+            comment = self.take('comment') if self.peek() == 'comment' else None
+            if state == 'unknown' or (comment and not times and state is None):
+                raise ValueError('opening_hours is unknown')
+            if days is not None and not days and not times and state is None:
+                raise ValueError('Rule without weekdays')
+            rules.append((days, times, state))
+            if self.peek() == ',':
+                self.pos += 1
+            elif self.peek() is not None:
+                raise ValueError('Unexpected token in opening_hours')
+        return rules
+
+
+def compile_opening_hours(value):
+    """Compile an ``opening_hours`` string into interval boundaries, None if unsupported."""
+    if not value or not isinstance(value, str):
+        return None
+    schedule = {day: [] for day in range(7)}
+    try:
+        for rule_text in value.split(';'):
+            for index, (days, times, state) in enumerate(RuleParser(tokenize(rule_text)).parse()):
+                if days is None:
+                    days = set(range(7))
+                if state in ('off', 'closed'):
+                    spans = []
+                else:
+                    spans = times or [(0, DAY_MINUTES)]
+                for day in days:
+                    # A ';' rule replaces what earlier rules said about its days
+                    if index == 0 or state in ('off', 'closed'):
+                        schedule[day] = list(spans)
+                    else:
+                        schedule[day].extend(spans)
+    except ValueError:
+        return None
+
+    intervals = []
+    for day, spans in schedule.items():
+        for start, end in spans:
+            start, end = day * DAY_MINUTES + start, day * DAY_MINUTES + end
+            if end > WEEK_MINUTES:
+                # Sunday night into Monday morning
+                intervals.append((0, end - WEEK_MINUTES))
+                end = WEEK_MINUTES
+            intervals.append((start, end))
+
+    boundaries = []
+    for start, end in sorted(intervals):
+        if boundaries and start <= boundaries[-1]:
+            boundaries[-1] = max(boundaries[-1], end)
+        else:
+            boundaries += [start, end]
+    return boundaries
+
+
+def minute_of_week(moment):
+    return moment.weekday() * DAY_MINUTES + moment.hour * 60 + moment.minute
+
+
+def parse_open_at(value):
+    """
+    Minute of the week for an ISO 8601 ``open_at`` value. Naive values are
+    local time of OPENING_HOURS_TIME_ZONE, aware ones are converted to it.
+    """
+    try:
+        moment = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError('open_at must be an ISO 8601 date and time')
+    if moment.tzinfo is not None:
+        moment = moment.astimezone(ZoneInfo(getattr(settings, 'OPENING_HOURS_TIME_ZONE', 'Europe/Berlin')))
+    return minute_of_week(moment)
+
+
+def filter_open_at(locations, minute):
+    """Keep the ``locations`` open at ``minute`` of the week; unknown schedules never match."""
+    sql = OPEN_AT_SQL.format(table=locations.model._meta.db_table)
+    return locations.filter(opening_intervals__isnull=False).filter(
+        RawSQL(sql, (minute,), output_field=BooleanField())
+    )
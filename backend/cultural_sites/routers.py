@@ -0,0 +1,248 @@
+"""
+Read-replica routing for the map endpoints.
+
+Views decorated with ``replica_reads`` may read Location data (and the
+categories derived from it) from one of DATABASE_REPLICAS; everything else,
+favorites and users included, stays on the primary, so a user always reads
+their own favorites writes. Within such a view:
+
+* a write pins the rest of the request to the primary (read-your-writes),
+* reads inside a transaction on the primary stay there,
+* one replica serves all reads of the request, so they see one state.
+
+A replica is only used when it has replayed the primary's WAL up to the
+position recorded with the current dataset version (DatasetVersion.wal_lsn,
+taken after the commit of the last Location write). Anything cached under
+that version is then built from data at least as new as the version. A
+replica's replay position is trusted for REPLICA_LAG_CHECK_INTERVAL seconds
+and then queried again; until it has caught up, or while it cannot be
+reached, reads go to the primary. A request whose replica fails with a
+connection error is run again on the primary.
+
+Aliases that are not PostgreSQL (e.g. a SQLite/SpatiaLite copy standing in
+for a replica in development) have no replay position and always count as
+caught up. A PostgreSQL alias that is not in recovery is not a replica and
+is never used.
+"""
+import contextvars
+import random
+import threading
+import time
+from functools import wraps
+from inspect import iscoroutinefunction
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, InterfaceError, OperationalError, connections
+
+from .caching import get_dataset_state
+
+SAFE_METHODS = ('GET', 'HEAD')
+# Models whose reads may go to a replica
+REPLICA_MODELS = {'cultural_sites.location', 'cultural_sites.category', 'cultural_sites.category_locations'}
+
+REPLAY_POSITION_SQL = 'SELECT pg_is_in_recovery(), pg_last_wal_replay_lsn()::text'
+# Replay position of aliases without WAL (stand-ins), ahead of any LSN
+NO_WAL = float('inf')
+# Errors of a replica that went away; the request is retried on the primary
+CONNECTION_ERRORS = (OperationalError, InterfaceError)
+
+_request_state = contextvars.ContextVar('replica_reads', default=None)
+
+
+def replica_reads(view):
+    """
+    Allow the Location reads of GET requests to ``view`` (sync or async) to
+    use a read replica. If the replica cannot be reached the view runs once
+    more on the primary, and the replica is skipped until it is checked again.
+    The iterator of a streaming response keeps the request's routing state.
+    """
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if request.method not in SAFE_METHODS:
+                return await view(request, *args, **kwargs)
+            state = {'pinned': False}
+            token = _request_state.set(state)
+            try:
+                try:
+                    response = await view(request, *args, **kwargs)
+                except CONNECTION_ERRORS:
+                    if not replica_failed(state):
+                        raise
+                    response = await view(request, *args, **kwargs)
+            finally:
+                _request_state.reset(token)
+            return keep_state(response, state)
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if request.method not in SAFE_METHODS:
+            return view(request, *args, **kwargs)
+        state = {'pinned': False}
+        token = _request_state.set(state)
+        try:
+            try:
+                response = view(request, *args, **kwargs)
+            except CONNECTION_ERRORS:
+                if not replica_failed(state):
+                    raise
+                response = view(request, *args, **kwargs)
+        finally:
+            _request_state.reset(token)
+        return keep_state(response, state)
+    return wrapper
+
+
+def replica_failed(state):
+    """
+    Handle a connection error during a request: pin the request to the
+    primary and mark its replica as unusable. False if no replica was used.
+    """
+    replica = state.get('replica')
+    if state['pinned'] or replica is None:
+        return False
+    state['pinned'] = True
+    get_replay_positions().mark_unusable(replica)
+    connections[replica].close()
+    return True
+
+
+def keep_state(response, state):
+    # A streaming body is read after the view returned, outside its context
+    if getattr(response, 'streaming', False):
+        if response.is_async:
+            response.streaming_content = _astream_with_state(response.streaming_content, state)
+        else:
+            response.streaming_content = _stream_with_state(response.streaming_content, state)
+    return response
+
+
+def _stream_with_state(content, state):
+    iterator = iter(content)
+    while True:
+        token = _request_state.set(state)
+        try:
+            chunk = next(iterator)
+        except StopIteration:
+            return
+        except CONNECTION_ERRORS:
+            # Too late to retry, but later requests skip the replica
+            replica_failed(state)
+            raise
+        finally:
+            _request_state.reset(token)
+        yield chunk
+
+
+async def _astream_with_state(content, state):
+    iterator = aiter(content)
+    while True:
+        token = _request_state.set(state)
+        try:
+            chunk = await anext(iterator)
+        except StopAsyncIteration:
+            return
+        except CONNECTION_ERRORS:
+            replica_failed(state)
+            raise
+        finally:
+            _request_state.reset(token)
+        yield chunk
+
+
+def parse_lsn(value):
+    """``'16/B374D848'`` as an integer; '' (nothing recorded) is 0."""
+    if not value:
+        return 0
+    high, _, low = value.partition('/')
+    return (int(high, 16) << 32) | int(low, 16)
+
+
+def replay_position(alias):
+    """WAL position ``alias`` has replayed, None when it is no usable replica."""
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return NO_WAL
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(REPLAY_POSITION_SQL)
+            in_recovery, replayed = cursor.fetchone()
+    except DatabaseError:
+        connection.close()
+        return None
+    if not in_recovery or replayed is None:
+        return None
+    return parse_lsn(replayed)
+
+
+class ReplayPositions:
+    """
+    Last known replay position of each replica in this process. A position
+    is trusted for ``interval`` seconds, then the replica is asked again, so
+    a replica that went down or was rebuilt drops out within ``interval``.
+    """
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.positions = {}
+
+    def caught_up(self, alias, lsn):
+        checked = self.positions.get(alias)
+        if checked is None or time.monotonic() - checked[0] >= self.interval:
+            with self.lock:
+                checked = self.positions.get(alias)
+                if checked is None or time.monotonic() - checked[0] >= self.interval:
+                    checked = self.positions[alias] = (time.monotonic(), replay_position(alias))
+        return checked[1] is not None and checked[1] >= lsn
+
+    def mark_unusable(self, alias):
+        self.positions[alias] = (time.monotonic(), None)
+
+
+_replay_positions = None
+
+
+def get_replay_positions():
+    global _replay_positions
+    if _replay_positions is None:
+        _replay_positions = ReplayPositions(getattr(settings, 'REPLICA_LAG_CHECK_INTERVAL', 1))
+    return _replay_positions
+
+
+def choose_replica(state):
+    if 'replica' not in state:
+        state['replica'] = None
+        replicas = getattr(settings, 'DATABASE_REPLICAS', [])
+        if replicas:
+            _, wal_lsn = get_dataset_state()
+            lsn = parse_lsn(wal_lsn)
+            positions = get_replay_positions()
+            caught_up = [alias for alias in replicas if positions.caught_up(alias, lsn)]
+            if caught_up:
+                state['replica'] = random.choice(caught_up)
+    return state['replica']
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        state = _request_state.get()
+        if state is None or state['pinned'] or model._meta.label_lower not in REPLICA_MODELS:
+            return None
+        if connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return choose_replica(state)
+
+    def db_for_write(self, model, **hints):
+        state = _request_state.get()
+        if state is not None:
+            state['pinned'] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Replicas hold the same data as the primary
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db == DEFAULT_DB_ALIAS
@@ -0,0 +1,265 @@
+"""
+In-process street routing.
+
+The street graph is read from a GeoJSON extract of OSM ways (LineStrings
+with a ``highway`` tag, e.g. an Overpass ``way[highway]`` export) and kept
+in compressed sparse row form: ``offsets[n]:offsets[n + 1]`` is the slice of
+``targets``/``weights`` holding the outgoing edges of node ``n``. Queries
+run A* with a great-circle heuristic, so no external routing service is
+needed.
+"""
+import heapq
+import math
+import threading
+from array import array
+from collections import OrderedDict, defaultdict
+
+import ijson
+from django.conf import settings
+
+EARTH_RADIUS = 6371008.8
+# Grid cell size (degrees) of the nearest-node lookup
+NODE_GRID_SIZE = 0.005
+# Rings of grid cells searched around a point before giving up on snapping
+NODE_SEARCH_RINGS = 4
+# Points further than this (meters) from every node are outside the graph
+DEFAULT_MAX_SNAP_DISTANCE = 500
+
+
+def haversine(lon1, lat1, lon2, lat2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    dphi = phi2 - phi1
+    dlambda = math.radians(lon2 - lon1)
+    a = math.sin(dphi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(dlambda / 2) ** 2
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def iter_way_lines(file_obj):
+    """Yield ``(coordinates, properties)`` for each street line in a GeoJSON file."""
+    for feature in ijson.items(file_obj, 'features.item', use_float=True):
+        geometry = feature.get('geometry') or {}
+        properties = feature.get('properties') or {}
+        if 'highway' not in properties:
+            continue
+        if geometry.get('type') == 'LineString':
+            yield geometry['coordinates'], properties
+        elif geometry.get('type') == 'MultiLineString':
+            for line in geometry['coordinates']:
+                yield line, properties
+
+
+class RoutingGraph:
+    def __init__(self, lons, lats, offsets, targets, weights):
+        self.lons = lons
+        self.lats = lats
+        self.offsets = offsets
+        self.targets = targets
+        self.weights = weights
+        self.grid = defaultdict(list)
+        for node, (lon, lat) in enumerate(zip(lons, lats)):
+            self.grid[self.grid_cell(lon, lat)].append(node)
+
+    @property
+    def node_count(self):
+        return len(self.lons)
+
+    @classmethod
+    def from_lines(cls, lines):
+        node_ids = {}
+        lons, lats = array('d'), array('d')
+        edges = []
+
+        def node_for(coord):
+            # Ways share a node where they share a coordinate
+            key = (round(coord[0], 7), round(coord[1], 7))
+            node = node_ids.get(key)
+            if node is None:
+                node = node_ids[key] = len(lons)
+                lons.append(key[0])
+                lats.append(key[1])
+            return node
+
+        for coordinates, properties in lines:
+            oneway = str(properties.get('oneway', 'no')).lower()
+            nodes = [node_for(coord) for coord in coordinates]
+            for u, v in zip(nodes, nodes[1:]):
+                if u == v:
+                    continue
+                length = haversine(lons[u], lats[u], lons[v], lats[v])
+                if oneway in ('yes', 'true', '1'):
+                    edges.append((u, v, length))
+                elif oneway == '-1':
+                    edges.append((v, u, length))
+                else:
+                    edges.append((u, v, length))
+                    edges.append((v, u, length))
+
+        # Counting sort of the edges by source node into CSR arrays
+        offsets = array('l', [0] * (len(lons) + 1))
+        for u, _, _ in edges:
+            offsets[u + 1] += 1
+        for node in range(len(lons)):
+            offsets[node + 1] += offsets[node]
+        targets = array('l', [0] * len(edges))
+        weights = array('d', [0.0] * len(edges))
+        fill = array('l', offsets[:-1])
+        for u, v, length in edges:
+            targets[fill[u]] = v
+            weights[fill[u]] = length
+            fill[u] += 1
+        return cls(lons, lats, offsets, targets, weights)
+
+    @classmethod
+    def from_geojson(cls, path):
+        with open(path, 'rb') as f:
+            return cls.from_lines(iter_way_lines(f))
+
+    def grid_cell(self, lon, lat):
+        return int(math.floor(lon / NODE_GRID_SIZE)), int(math.floor(lat / NODE_GRID_SIZE))
+
+    def nearest_node(self, lon, lat):
+        cx, cy = self.grid_cell(lon, lat)
+        best, best_distance = None, math.inf
+        for ring in range(NODE_SEARCH_RINGS + 1):
+            for x in range(cx - ring, cx + ring + 1):
+                for y in range(cy - ring, cy + ring + 1):
+                    if max(abs(x - cx), abs(y - cy)) != ring:
+                        continue
+                    for node in self.grid.get((x, y), ()):
+                        distance = haversine(lon, lat, self.lons[node], self.lats[node])
+                        if distance < best_distance:
+                            best, best_distance = node, distance
+            # Anything in the next ring is at least `ring` cells away
+            if best is not None and ring > 0:
+                break
+        return best
+
+    def shortest_path(self, source, target):
+        """A* from ``source`` to ``target``; returns ``(meters, [nodes])`` or None."""
+        lons, lats = self.lons, self.lats
+        offsets, targets, weights = self.offsets, self.targets, self.weights
+        target_lon, target_lat = lons[target], lats[target]
+
+        distances = {source: 0.0}
+        previous = {}
+        queue = [(haversine(lons[source], lats[source], target_lon, target_lat), 0.0, source)]
+        while queue:
+            _, distance, node = heapq.heappop(queue)
+            if node == target:
+                path = [node]
+                while node in previous:
+                    node = previous[node]
+                    path.append(node)
+                return distance, path[::-1]
+            if distance > distances[node]:
+                continue
+            for edge in range(offsets[node], offsets[node + 1]):
+                neighbour = targets[edge]
+                candidate = distance + weights[edge]
+                if candidate < distances.get(neighbour, math.inf):
+                    distances[neighbour] = candidate
+                    previous[neighbour] = node
+                    estimate = haversine(lons[neighbour], lats[neighbour], target_lon, target_lat)
+                    heapq.heappush(queue, (candidate + estimate, candidate, neighbour))
+        return None
+
+    def path_coordinates(self, path):
+        return [[self.lons[node], self.lats[node]] for node in path]
+
+
+class RouteCache:
+    """Thread-safe LRU of computed routes keyed by (source node, target node)."""
+
+    def __init__(self, size):
+        self.size = size
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                return self.entries[key]
+        return default
+
+    def set(self, key, value):
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.size:
+                self.entries.popitem(last=False)
+
+
+class RoutingUnavailable(Exception):
+    """No street graph is configured (ROUTING_GRAPH_FILE)."""
+
+
+MISSING = object()
+_graph = None
+_cache = None
+_lock = threading.Lock()
+
+
+def get_router():
+    """
+    Return the process-wide graph and route cache, loading the graph on first
+    use. Raises RoutingUnavailable without a ROUTING_GRAPH_FILE and OSError
+    when it cannot be read.
+    """
+    global _graph, _cache
+    if _graph is None:
+        path = getattr(settings, 'ROUTING_GRAPH_FILE', None)
+        if not path:
+            raise RoutingUnavailable('ROUTING_GRAPH_FILE is not set')
+        with _lock:
+            if _graph is None:
+                _cache = RouteCache(getattr(settings, 'ROUTING_CACHE_SIZE', 1024))
+                _graph = RoutingGraph.from_geojson(path)
+    return _graph, _cache
+
+
+def reset_router():
+    """Drop the loaded graph, e.g. after ROUTING_GRAPH_FILE changed."""
+    global _graph, _cache
+    with _lock:
+        _graph = _cache = None
+
+
+def snap(graph, lon, lat):
+    """Nearest graph node within ROUTING_MAX_SNAP_DISTANCE meters, or None."""
+    node = graph.nearest_node(lon, lat)
+    if node is None:
+        return None
+    distance = haversine(lon, lat, graph.lons[node], graph.lats[node])
+    if distance > getattr(settings, 'ROUTING_MAX_SNAP_DISTANCE', DEFAULT_MAX_SNAP_DISTANCE):
+        return None
+    return node
+
+
+def route(from_lon, from_lat, to_lon, to_lat):
+    """
+    Route between two points, OSRM style: returns ``{'distance', 'duration',
+    'geometry'}`` or None when the points cannot be connected or are too far
+    from the graph.
+    """
+    graph, cache = get_router()
+    source = snap(graph, from_lon, from_lat)
+    target = snap(graph, to_lon, to_lat)
+    if source is None or target is None:
+        return None
+
+    key = (source, target)
+    result = cache.get(key, MISSING)
+    if result is MISSING:
+        # Unreachable pairs are cached too, they are the most expensive to search
+        result = graph.shortest_path(source, target)
+        cache.set(key, result)
+    if result is None:
+        return None
+
+    distance, path = result
+    return {
+        'distance': round(distance, 1),
+        'duration': round(distance / getattr(settings, 'ROUTING_SPEED', 8.3), 1),
+        'geometry': {'type': 'LineString', 'coordinates': graph.path_coordinates(path)},
+    }
@@ -0,0 +1,20 @@
+from django.contrib.postgres.search import TrigramWordSimilarity
+
+from .normalization import normalize_search_text
+
+
+def search_locations(locations, query):
+    """
+    Filter ``locations`` by ``query`` and annotate a ``search_rank``.
+
+    Both sides are normalized the same way, so "Strasse" finds "Straße".
+    ``search_text__contains`` compiles to ``LIKE '%...%'``, which the
+    ``gin_trgm_ops`` index on ``search_text`` answers without a table scan.
+    """
+    normalized = normalize_search_text(query)
+    if not normalized:
+        return locations
+    return locations.filter(search_text__contains=normalized).annotate(
+        search_rank=TrigramWordSimilarity(normalized, 'search_text')
+    )
+
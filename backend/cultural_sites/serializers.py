@@ -22,11 +22,17 @@ class UserRegisterSerializer(serializers.ModelSerializer):
         return user
 
 
+# Columns maintained by the backend itself, never part of the GeoJSON output
+LOCATION_INTERNAL_FIELDS = (
+    'search_text', 'content_hash', 'categories', 'city_code', 'wheelchair_code', 'tags', 'opening_intervals',
+)
+
+
 class LocationSerializer(GeoFeatureModelSerializer):
     class Meta:
         model = Location
         geo_field = "geometry"  # required for GeoJSON output
-        fields = "__all__"
+        exclude = LOCATION_INTERNAL_FIELDS
 
 
 class FavoriteSerializer(serializers.ModelSerializer):
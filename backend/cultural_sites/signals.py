@@ -0,0 +1,35 @@
+from django.contrib.auth.models import User
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import invalidate_cached_user
+from .caching import bump_dataset_version
+from .categories import sync_location_categories
+from .favorites import invalidate_favorites
+from .models import Favorite, Location
+
+
+@receiver(post_save, sender=Location)
+def location_saved(sender, instance, update_fields=None, **kwargs):
+    if update_fields is None or 'categories' in update_fields:
+        sync_location_categories([instance])
+    bump_dataset_version()
+
+
+@receiver(post_delete, sender=Location)
+def location_deleted(sender, instance, **kwargs):
+    bump_dataset_version()
+
+
+# Any change to a user (password, active flag, ...) or its deletion drops the
+# users cached by CookiesJWTAuthentication
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    invalidate_cached_user(instance.pk)
+
+
+@receiver(post_save, sender=Favorite)
+@receiver(post_delete, sender=Favorite)
+def favorite_changed(sender, instance, **kwargs):
+    invalidate_favorites(instance.user_id)
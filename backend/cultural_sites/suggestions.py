@@ -0,0 +1,130 @@
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+
+from django.conf import settings
+
+from .caching import get_dataset_version
+from .normalization import normalize_search_text
+
+MIN_QUERY_LENGTH = 1
+MAX_LIMIT = 50
+# Upper bound on index entries inspected per query, keeps short prefixes cheap
+MAX_SCAN = 2000
+
+
+class SuggestionIndex:
+    """
+    In-memory prefix index over location names, streets and categories.
+
+    Every word start of every normalized suggestion text is stored in one
+    sorted list of terms; a query is a ``bisect`` into that list followed by
+    a short forward scan, so lookups never touch the database. The index is
+    rebuilt when the dataset version moves on.
+    """
+
+    def __init__(self, version_check_interval=1.0):
+        self.version_check_interval = version_check_interval
+        # (sorted terms, (entry index, at text start) per term, entries)
+        self.data = ([], [], [])
+        self.version = None
+        self.checked_at = 0.0
+        self.lock = threading.Lock()
+
+    def build(self, rows):
+        entries = []
+        streets = Counter()
+        categories = Counter()
+        for location_id, name, addr_street, tourism, amenity, landuse in rows:
+            if name:
+                entries.append((name, 'location', location_id, 1))
+            if addr_street:
+                streets[addr_street] += 1
+            for category in (tourism, amenity, landuse):
+                if category:
+                    categories[category] += 1
+        entries.extend((street, 'street', None, count) for street, count in streets.items())
+        entries.extend((category, 'category', None, count) for category, count in categories.items())
+
+        pairs = []
+        for entry_index, entry in enumerate(entries):
+            text = normalize_search_text(entry[0])
+            start = 0
+            while True:
+                pairs.append((text[start:], entry_index, start == 0))
+                start = text.find(' ', start) + 1
+                if not start:
+                    break
+        pairs.sort()
+
+        # Swap in one go so concurrent readers see either the old or new index
+        self.data = (
+            [pair[0] for pair in pairs],
+            [(pair[1], pair[2]) for pair in pairs],
+            entries,
+        )
+
+    def refresh(self):
+        from .models import Location
+
+        version = get_dataset_version()
+        rows = Location.objects.values_list('id', 'name', 'addr_street', 'tourism', 'amenity', 'landuse')
+        self.build(rows.iterator(chunk_size=2000))
+        self.version = version
+
+    def ensure_current(self):
+        now = time.monotonic()
+        if self.version is not None and now - self.checked_at < self.version_check_interval:
+            return
+        # One thread rebuilds, the others keep answering from the current data
+        blocking = self.version is None
+        if not self.lock.acquire(blocking=blocking):
+            return
+        try:
+            if self.version is None or get_dataset_version() != self.version:
+                self.refresh()
+            self.checked_at = time.monotonic()
+        finally:
+            self.lock.release()
+
+    def search(self, query, limit=10):
+        query = normalize_search_text(query)
+        if len(query) < MIN_QUERY_LENGTH:
+            return []
+        limit = max(1, min(limit, MAX_LIMIT))
+
+        terms, term_entries, entries = self.data
+        best = {}
+        position = bisect_left(terms, query)
+        end = min(len(terms), position + MAX_SCAN)
+        while position < end and terms[position].startswith(query):
+            entry_index, at_start = term_entries[position]
+            best[entry_index] = best.get(entry_index, False) or at_start
+            position += 1
+
+        # Matches at the start of the text first, then the most common values
+        ranked = sorted(
+            best.items(),
+            key=lambda item: (not item[1], -entries[item[0]][3], entries[item[0]][0]),
+        )
+        return [
+            {'text': entries[index][0], 'kind': entries[index][1], 'id': entries[index][2]}
+            for index, _ in ranked[:limit]
+        ]
+
+
+index = None
+
+
+def get_suggestion_index():
+    index.ensure_current()
+    return index
+
+
+def setup_suggestion_index():
+    """Create the process-wide index; its data is loaded on first use."""
+    global index
+    index = SuggestionIndex(
+        version_check_interval=getattr(settings, 'LOCATION_SUGGEST_VERSION_CHECK_INTERVAL', 1.0),
+    )
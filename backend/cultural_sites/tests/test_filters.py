@@ -0,0 +1,19 @@
+from django.test import SimpleTestCase
+
+from cultural_sites.views import parse_tag_filter
+
+
+class ParseTagFilterTests(SimpleTestCase):
+    def test_key_and_value(self):
+        self.assertEqual(parse_tag_filter('cuisine=pizza'), ('cuisine', 'pizza'))
+        self.assertEqual(parse_tag_filter('diet:vegan=yes'), ('diet:vegan', 'yes'))
+        # Only the first '=' separates, values may contain more
+        self.assertEqual(parse_tag_filter('note=a=b'), ('note', 'a=b'))
+
+    def test_bare_keys_keep_their_colons(self):
+        self.assertEqual(parse_tag_filter('wheelchair'), ('wheelchair', None))
+        self.assertEqual(parse_tag_filter('diet:vegan'), ('diet:vegan', None))
+        self.assertEqual(parse_tag_filter('addr:street'), ('addr:street', None))
+
+    def test_empty_value(self):
+        self.assertEqual(parse_tag_filter('name='), ('name', ''))
@@ -0,0 +1,104 @@
+import json
+from unittest import mock
+
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase
+from rest_framework.renderers import JSONRenderer
+
+from cultural_sites import geojson
+from cultural_sites.models import Location
+from cultural_sites.serializers import LocationSerializer
+
+
+def feature(lon, lat, location_id=None, **properties):
+    # Member order of geojson.build_feature
+    return {
+        "id": location_id, "type": "Feature",
+        "geometry": {"type": "Point", "coordinates": [lon, lat]}, "properties": properties,
+    }
+
+
+class BulkGeoJSONTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        Location.objects.create(
+            osm_id='node/1', name='Schloßbergmuseum', geometry=Point(12.9164, 50.8393, srid=4326),
+            tourism='museum', website='https://example.org', addr_city='Chemnitz',
+        )
+        # Coordinates close to 0, where orjson and json format floats differently
+        Location.objects.create(osm_id='node/2', name='Null Island', geometry=Point(1e-05, -3.5e-06, srid=4326))
+        # JSONRenderer escapes U+2028/U+2029
+        Location.objects.create(osm_id='node/3', name='Line\u2028Break', geometry=Point(12.9, 50.8, srid=4326))
+        Location.objects.create(osm_id='node/4', name=None, geometry=Point(-0.5, 0, srid=4326))
+
+    def locations(self):
+        return Location.objects.order_by('id')
+
+    def serializer_output(self, data):
+        return JSONRenderer().render(data)
+
+    def test_collection_matches_serializer(self):
+        expected = self.serializer_output(LocationSerializer(self.locations(), many=True).data)
+        rows = geojson.feature_values(self.locations())
+        self.assertEqual(geojson.dumps(geojson.feature_collection(rows)), expected)
+
+    def test_collection_matches_serializer_without_orjson(self):
+        expected = self.serializer_output(LocationSerializer(self.locations(), many=True).data)
+        rows = geojson.feature_values(self.locations())
+        with mock.patch.object(geojson, 'orjson', None):
+            self.assertEqual(geojson.dumps(geojson.feature_collection(rows)), expected)
+
+    def test_single_feature_matches_serializer(self):
+        for location in self.locations():
+            with self.subTest(osm_id=location.osm_id):
+                expected = self.serializer_output(LocationSerializer(location).data)
+                row = geojson.feature_values(Location.objects.filter(pk=location.pk)).get()
+                self.assertEqual(geojson.dumps(geojson.build_feature(row)), expected)
+
+    def test_stream_equals_dumps(self):
+        rows = list(geojson.feature_values(self.locations()))
+        expected = geojson.dumps(geojson.feature_collection(rows))
+        self.assertEqual(b''.join(geojson.stream_feature_collection(rows)), expected)
+        with mock.patch.object(geojson, 'STREAM_CHUNK_BYTES', 1):
+            chunks = list(geojson.stream_feature_collection(rows))
+        self.assertGreater(len(chunks), len(rows))
+        self.assertEqual(b''.join(chunks), expected)
+
+
+class DumpsTests(SimpleTestCase):
+    def stdlib(self, data):
+        return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode()
+
+    def test_small_coordinates_use_stdlib_floats(self):
+        self.assertTrue(geojson._needs_stdlib_floats({"features": [feature(1e-05, 50.8)]}))
+        self.assertTrue(geojson._needs_stdlib_floats(feature(12.9, -9e-05)))
+        # The locations view nests the collection
+        self.assertTrue(geojson._needs_stdlib_floats({"features": {"features": [feature(0.00001, 0)]}}))
+        self.assertFalse(geojson._needs_stdlib_floats({"features": [feature(0, 0.0001), feature(12.9, 50.8)]}))
+        self.assertEqual(geojson.dumps(feature(1e-05, -3.5e-06)), self.stdlib(feature(1e-05, -3.5e-06)))
+
+    def test_line_separators_are_escaped(self):
+        self.assertEqual(geojson.dumps({"name": "a\u2028b\u2029"}), b'{"name":"a\\u2028b\\u2029"}')
+
+    def test_indexed_body_equals_dumps(self):
+        collection = {"type": "FeatureCollection", "features": []}
+        data = {"type": "FeatureCollection", "features": collection, "truncated": False}
+        self.assertEqual(geojson.dumps_indexed(data, collection), (geojson.dumps(data), ([], [])))
+        for index, (lon, lat) in enumerate([(12.9164, 50.8393), (1e-05, 0), (-0.5, 50.8)], 1):
+            collection["features"].append(feature(lon, lat, index, name=f"}}}}{index}"))
+        body, feature_index = geojson.dumps_indexed(data, collection)
+        self.assertEqual(body, geojson.dumps(data))
+        self.assertEqual(feature_index[0], [1, 2, 3])
+        self.assertEqual(collection["features"][0]["id"], 1)
+
+    def test_add_flag_equals_dumps_with_the_property(self):
+        collection = {"type": "FeatureCollection", "features": [
+            feature(12.9 + index / 100, 50.8, index, name=f"Site {index}\u2028")
+            for index in range(1, 6)
+        ]}
+        data = {"type": "FeatureCollection", "features": collection}
+        body, feature_index = geojson.dumps_indexed(data, collection)
+        flagged = geojson.add_flag(body, feature_index, 'is_favorite', {2, 5, 99})
+        for item in collection["features"]:
+            item["properties"]["is_favorite"] = item["id"] in {2, 5}
+        self.assertEqual(flagged, geojson.dumps(data))
@@ -0,0 +1,121 @@
+from datetime import datetime
+
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase
+
+from cultural_sites.models import Location
+from cultural_sites.opening_hours import (
+    DAY_MINUTES, WEEK_MINUTES, compile_opening_hours, filter_open_at, minute_of_week, parse_open_at,
+)
+
+
+def at(day, hours, minutes=0):
+    """Minute of the week of weekday ``day`` (0 = Monday) at hours:minutes."""
+    return day * DAY_MINUTES + hours * 60 + minutes
+
+
+class CompileOpeningHoursTests(SimpleTestCase):
+    def test_always_open(self):
+        self.assertEqual(compile_opening_hours('24/7'), [0, WEEK_MINUTES])
+
+    def test_weekday_range(self):
+        self.assertEqual(
+            compile_opening_hours('Mo-Fr 09:00-17:00'),
+            [boundary for day in range(5) for boundary in (at(day, 9), at(day, 17))],
+        )
+
+    def test_several_spans_and_rules(self):
+        self.assertEqual(
+            compile_opening_hours('Mo 09:00-12:00,13:00-17:00; Sa 10:00-14:00'),
+            [at(0, 9), at(0, 12), at(0, 13), at(0, 17), at(5, 10), at(5, 14)],
+        )
+
+    def test_wrapping_weekday_range(self):
+        self.assertEqual(
+            compile_opening_hours('Fr-Mo 10:00-12:00'),
+            [at(0, 10), at(0, 12), at(4, 10), at(4, 12), at(5, 10), at(5, 12), at(6, 10), at(6, 12)],
+        )
+
+    def test_past_midnight(self):
+        self.assertEqual(compile_opening_hours('Sa 22:00-02:00'), [at(5, 22), at(6, 2)])
+        # Sunday night continues into Monday morning
+        self.assertEqual(compile_opening_hours('Su 20:00-02:00'), [0, at(0, 2), at(6, 20), WEEK_MINUTES])
+
+    def test_open_end(self):
+        self.assertEqual(compile_opening_hours('Tu 18:00+'), [at(1, 18), at(2, 0)])
+
+    def test_later_rule_overrides_its_days(self):
+        self.assertEqual(compile_opening_hours('Mo 09:00-12:00; Mo 14:00-16:00'), [at(0, 14), at(0, 16)])
+        schedule = compile_opening_hours('Mo-Su 08:00-18:00; We off')
+        self.assertNotIn(at(2, 8), schedule)
+        self.assertEqual(len(schedule), 12)
+
+    def test_additional_rule(self):
+        self.assertEqual(
+            compile_opening_hours('Mo 10:00-12:00, We 14:00-16:00'),
+            [at(0, 10), at(0, 12), at(2, 14), at(2, 16)],
+        )
+
+    def test_holidays_and_comments_are_ignored(self):
+        self.assertEqual(compile_opening_hours('Mo-Fr 09:00-17:00; PH off'), compile_opening_hours('Mo-Fr 09:00-17:00'))
+        self.assertEqual(
+            compile_opening_hours('Mo-Fr 10:00-18:00 "by appointment"'),
+            compile_opening_hours('Mo-Fr 10:00-18:00'),
+        )
+
+    def test_unsupported_or_missing_values_are_unknown(self):
+        for value in ('Jan-Mar Mo 10:00-12:00', 'sunrise-sunset', 'Mo-Fr unknown', '', None, 42):
+            with self.subTest(value=value):
+                self.assertIsNone(compile_opening_hours(value))
+
+
+class ParseOpenAtTests(SimpleTestCase):
+    def test_naive_values_are_local_time(self):
+        # 2025-06-14 is a Saturday
+        self.assertEqual(parse_open_at('2025-06-14T18:30'), at(5, 18, 30))
+
+    def test_aware_values_are_converted(self):
+        self.assertEqual(parse_open_at('2025-06-14T16:30Z'), at(5, 18, 30))
+        self.assertEqual(parse_open_at('2025-06-16T00:00+02:00'), 0)
+
+    def test_minute_of_week(self):
+        self.assertEqual(minute_of_week(datetime(2025, 6, 15, 23, 59)), WEEK_MINUTES - 1)
+
+    def test_malformed_values_raise(self):
+        with self.assertRaises(ValueError):
+            parse_open_at('saturday evening')
+
+
+class FilterOpenAtTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.office = Location.objects.create(
+            osm_id='node/1', name='Office', geometry=Point(12.92, 50.83, srid=4326),
+            tags={'opening_hours': 'Mo-Fr 09:00-17:00'},
+        )
+        cls.bar = Location.objects.create(
+            osm_id='node/2', name='Bar', geometry=Point(12.92, 50.83, srid=4326),
+            tags={'opening_hours': 'Su 20:00-02:00'},
+        )
+        cls.unknown = Location.objects.create(
+            osm_id='node/3', name='Unknown', geometry=Point(12.92, 50.83, srid=4326),
+            tags={'opening_hours': 'sunrise-sunset'},
+        )
+
+    def open_at(self, minute):
+        return set(filter_open_at(Location.objects.all(), minute).values_list('name', flat=True))
+
+    def test_open_locations(self):
+        self.assertEqual(self.open_at(at(0, 10)), {'Office'})
+        self.assertEqual(self.open_at(at(6, 23)), {'Bar'})
+        # Monday 01:00 is still Sunday night
+        self.assertEqual(self.open_at(at(0, 1)), {'Bar'})
+
+    def test_closing_time_is_exclusive(self):
+        self.assertEqual(self.open_at(at(0, 17)), set())
+        self.assertEqual(self.open_at(at(0, 16, 59)), {'Office'})
+
+    def test_unknown_schedules_never_match(self):
+        self.assertIsNone(self.unknown.opening_intervals)
+        self.assertNotIn('Unknown', self.open_at(at(0, 10)))
+
@@ -0,0 +1,76 @@
+import base64
+
+from django.contrib.gis.geos import Point
+from django.test import SimpleTestCase, TestCase
+
+from cultural_sites.geojson import feature_values
+from cultural_sites.models import Location
+from cultural_sites.pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, decode_cursor, encode_cursor, keyset_page, parse_page_size,
+)
+
+
+class CursorTests(SimpleTestCase):
+    def test_round_trip(self):
+        for name, location_id in (('', 1), ('Schloßbergmuseum', 42), ('a/b+c=', 7)):
+            with self.subTest(name=name):
+                cursor = encode_cursor(name, location_id)
+                self.assertNotIn('=', cursor)
+                self.assertEqual(decode_cursor(cursor), (name, location_id))
+
+    def test_invalid_cursors(self):
+        for cursor in ('garbage!', encode_cursor('name', '3'), encode_cursor('name', True), encode_cursor(None, 3)):
+            with self.subTest(cursor=cursor), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+
+    def test_wrong_shape(self):
+        # Valid base64 and JSON, but not a [name, id] pair
+        for data in ('5', '"name"', '{"name":1}', '[]', '["name"]', '["name",1,2]', '[1,"name"]', 'null'):
+            cursor = base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+            with self.subTest(data=data), self.assertRaises(ValueError):
+                decode_cursor(cursor)
+        with self.assertRaises(ValueError):
+            decode_cursor('NQ')
+
+    def test_page_size(self):
+        self.assertEqual(parse_page_size(None), DEFAULT_PAGE_SIZE)
+        self.assertEqual(parse_page_size('20'), 20)
+        self.assertEqual(parse_page_size(str(MAX_PAGE_SIZE + 1)), MAX_PAGE_SIZE)
+        for value in ('0', '-1', 'ten'):
+            with self.subTest(value=value), self.assertRaises(ValueError):
+                parse_page_size(value)
+
+
+class KeysetPageTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for osm_id, name in enumerate(['Museum', None, 'Castle', 'Museum', '', 'Art', None, 'Museum']):
+            Location.objects.create(osm_id=f'node/{osm_id}', name=name, geometry=Point(12.92, 50.83, srid=4326))
+        cls.expected = [
+            location.id for location in sorted(Location.objects.all(), key=lambda location: (location.name or '', location.id))
+        ]
+
+    def walk(self, page_size):
+        ids, cursor, pages = [], None, 0
+        while True:
+            rows, cursor = keyset_page(Location.objects.all(), cursor, page_size)
+            ids += [row[0] for row in rows]
+            pages += 1
+            if cursor is None:
+                return ids, pages
+
+    def test_pages_cover_every_row_once_in_order(self):
+        for page_size in (1, 2, 3, 8, 100):
+            with self.subTest(page_size=page_size):
+                ids, pages = self.walk(page_size)
+                self.assertEqual(ids, self.expected)
+                self.assertEqual(pages, max(1, -(-len(self.expected) // page_size)))
+
+    def test_rows_are_feature_values(self):
+        rows, _ = keyset_page(Location.objects.filter(name='Art'))
+        self.assertEqual(rows, list(feature_values(Location.objects.filter(name='Art'))))
+
+    def test_cursor_points_at_last_row(self):
+        rows, cursor = keyset_page(Location.objects.all(), page_size=3)
+        last = Location.objects.get(pk=rows[-1][0])
+        self.assertEqual(decode_cursor(cursor), (last.name or '', last.id))
@@ -0,0 +1,159 @@
+from types import SimpleNamespace
+from unittest import mock
+
+from django.db import OperationalError
+from django.http import StreamingHttpResponse
+from django.test import SimpleTestCase, override_settings
+
+from cultural_sites import routers
+from cultural_sites.models import Favorite, Location
+
+REPLICA_SETTINGS = {'DATABASE_REPLICAS': ['replica1'], 'REPLICA_LAG_CHECK_INTERVAL': 60}
+WRITE_LSN = '0/3000060'
+
+
+def request(method='GET'):
+    return SimpleNamespace(method=method)
+
+
+@override_settings(**REPLICA_SETTINGS)
+class ReplicaRouterTests(SimpleTestCase):
+    def setUp(self):
+        routers._replay_positions = None
+        self.addCleanup(setattr, routers, '_replay_positions', None)
+        self.router = routers.ReplicaRouter()
+        self.replayed = {'replica1': routers.parse_lsn(WRITE_LSN)}
+        patches = [
+            mock.patch.object(routers, 'get_dataset_state', return_value=(7, WRITE_LSN)),
+            mock.patch.object(routers, 'replay_position', side_effect=lambda alias: self.replayed[alias]),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+
+    def patch_connections(self):
+        replica = mock.Mock()
+        patch = mock.patch.object(routers, 'connections', {
+            'default': SimpleNamespace(in_atomic_block=False), 'replica1': replica,
+        })
+        patch.start()
+        self.addCleanup(patch.stop)
+        return replica
+
+    def read_alias(self, model=Location, method='GET', before=None):
+        @routers.replica_reads
+        def view(request):
+            if before:
+                before()
+            return self.router.db_for_read(model)
+        return view(request(method))
+
+    def test_caught_up_replica_serves_location_reads(self):
+        self.assertEqual(self.read_alias(), 'replica1')
+
+    def test_lagging_replica_is_skipped(self):
+        self.replayed['replica1'] -= 1
+        self.assertIsNone(self.read_alias())
+
+    def test_unreachable_replica_is_skipped(self):
+        self.replayed['replica1'] = None
+        self.assertIsNone(self.read_alias())
+
+    def test_favorites_stay_on_the_primary(self):
+        self.assertIsNone(self.read_alias(Favorite))
+
+    def test_reads_outside_decorated_views_stay_on_the_primary(self):
+        self.assertIsNone(self.router.db_for_read(Location))
+
+    def test_unsafe_methods_stay_on_the_primary(self):
+        self.assertIsNone(self.read_alias(method='POST'))
+
+    def test_write_pins_the_request_to_the_primary(self):
+        self.assertIsNone(self.read_alias(before=lambda: self.router.db_for_write(Location)))
+
+    @override_settings(DATABASE_REPLICAS=[])
+    def test_without_replicas_everything_reads_the_primary(self):
+        self.assertIsNone(self.read_alias())
+
+    def test_known_position_is_not_queried_again(self):
+        self.read_alias()
+        self.read_alias()
+        self.assertEqual(routers.replay_position.call_count, 1)
+
+    def test_lagging_replica_is_rechecked_after_the_interval(self):
+        self.replayed['replica1'] -= 1
+        self.assertIsNone(self.read_alias())
+        self.replayed['replica1'] += 1
+        # Still within REPLICA_LAG_CHECK_INTERVAL
+        self.assertIsNone(self.read_alias())
+        routers.get_replay_positions().interval = 0
+        self.assertEqual(self.read_alias(), 'replica1')
+
+
+    def test_caught_up_position_expires(self):
+        self.assertEqual(self.read_alias(), 'replica1')
+        # The replica went away after it had caught up
+        self.replayed['replica1'] = None
+        routers.get_replay_positions().interval = 0
+        self.assertIsNone(self.read_alias())
+
+    def test_connection_error_retries_on_the_primary(self):
+        replica = self.patch_connections()
+        aliases = []
+
+        @routers.replica_reads
+        def view(request):
+            alias = self.router.db_for_read(Location)
+            aliases.append(alias)
+            if alias == 'replica1':
+                raise OperationalError('server closed the connection unexpectedly')
+            return alias
+
+        self.assertIsNone(view(request()))
+        self.assertEqual(aliases, ['replica1', None])
+        replica.close.assert_called_once_with()
+        # Skipped until its position is checked again
+        self.assertIsNone(self.read_alias())
+
+    def test_errors_on_the_primary_are_not_retried(self):
+        calls = []
+
+        @routers.replica_reads
+        def view(request):
+            calls.append(self.router.db_for_read(Favorite))
+            raise OperationalError('primary is down')
+
+        with self.assertRaises(OperationalError):
+            view(request())
+        self.assertEqual(calls, [None])
+
+    def test_streaming_content_reads_from_the_replica(self):
+        @routers.replica_reads
+        def view(request):
+            return StreamingHttpResponse(
+                str(self.router.db_for_read(Location)) for _ in range(2)
+            )
+
+        response = view(request())
+        # Consumed after the view returned, like the handler does
+        self.assertEqual(b''.join(response.streaming_content), b'replica1replica1')
+        self.assertIsNone(self.router.db_for_read(Location))
+
+
+class ReplayPositionTests(SimpleTestCase):
+    def test_parse_lsn(self):
+        self.assertEqual(routers.parse_lsn(''), 0)
+        self.assertEqual(routers.parse_lsn('0/3000060'), 0x3000060)
+        self.assertEqual(routers.parse_lsn('16/B374D848'), (0x16 << 32) | 0xB374D848)
+        self.assertGreater(routers.parse_lsn('1/0'), routers.parse_lsn('0/FFFFFFFF'))
+
+    def test_stand_in_databases_count_as_caught_up(self):
+        with mock.patch.object(routers, 'connections', {'replica1': SimpleNamespace(vendor='sqlite')}):
+            self.assertGreater(routers.replay_position('replica1'), routers.parse_lsn('FFFFFFFF/FFFFFFFF'))
+
+    def test_primary_is_not_a_replica(self):
+        cursor = mock.MagicMock()
+        cursor.__enter__.return_value.fetchone.return_value = (False, None)
+        connection = SimpleNamespace(vendor='postgresql', cursor=lambda: cursor)
+        with mock.patch.object(routers, 'connections', {'replica1': connection}):
+            self.assertIsNone(routers.replay_position('replica1'))
@@ -0,0 +1,92 @@
+from pathlib import Path
+
+from django.contrib.auth.models import User
+from django.test import SimpleTestCase, override_settings
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from cultural_sites import routing
+from cultural_sites.views import route_view
+
+# Synthetic 7x6 grid of streets; the street at 50.832 is oneway eastbound
+SAMPLE_GRAPH = Path(routing.__file__).resolve().parent / 'data' / 'sample_streets.geojson'
+WEST, EAST, SOUTH, NORTH = 12.9, 12.945, 50.82, 50.85
+ONEWAY_LAT = 50.832
+GRID_LONS = [12.9, 12.9075, 12.915, 12.9225, 12.93, 12.9375, 12.945]
+
+
+def along_parallel(lat, lons):
+    return sum(routing.haversine(a, lat, b, lat) for a, b in zip(lons, lons[1:]))
+
+
+@override_settings(ROUTING_GRAPH_FILE=str(SAMPLE_GRAPH), ROUTING_MAX_SNAP_DISTANCE=500)
+class RoutingTests(SimpleTestCase):
+    def setUp(self):
+        routing.reset_router()
+        self.addCleanup(routing.reset_router)
+
+    def test_graph_holds_only_highway_nodes(self):
+        graph, _ = routing.get_router()
+        # The diagonal waterway in the file is not a street
+        self.assertEqual(graph.node_count, 42)
+
+    def test_route_follows_the_street(self):
+        result = routing.route(WEST, SOUTH, EAST, SOUTH)
+        self.assertAlmostEqual(result['distance'], along_parallel(SOUTH, GRID_LONS), delta=0.1)
+        self.assertEqual(result['geometry']['coordinates'], [[lon, SOUTH] for lon in GRID_LONS])
+        self.assertAlmostEqual(result['duration'], result['distance'] / 8.3, delta=0.1)
+
+    def test_no_shortcut_through_non_highway_lines(self):
+        result = routing.route(WEST, SOUTH, EAST, NORTH)
+        # Up the western avenue, then along the northern street (the shortest
+        # of the equally long grid paths, parallels shrink to the north)
+        expected = routing.haversine(WEST, SOUTH, WEST, NORTH) + along_parallel(NORTH, GRID_LONS)
+        self.assertAlmostEqual(result['distance'], expected, delta=0.1)
+
+    def test_oneway_street_is_only_used_eastbound(self):
+        eastbound = routing.route(WEST, ONEWAY_LAT, EAST, ONEWAY_LAT)
+        westbound = routing.route(EAST, ONEWAY_LAT, WEST, ONEWAY_LAT)
+        self.assertAlmostEqual(eastbound['distance'], along_parallel(ONEWAY_LAT, GRID_LONS), delta=0.1)
+        # Westbound has to leave the oneway street for a parallel one and back
+        self.assertGreater(westbound['distance'], eastbound['distance'] + 1000)
+        self.assertNotIn(ONEWAY_LAT, {lat for _, lat in westbound['geometry']['coordinates'][1:-1]})
+
+    def test_points_are_snapped_to_the_nearest_node(self):
+        result = routing.route(WEST + 0.0005, SOUTH + 0.0003, GRID_LONS[1] - 0.0004, SOUTH)
+        self.assertEqual(result['geometry']['coordinates'], [[WEST, SOUTH], [GRID_LONS[1], SOUTH]])
+
+    def test_points_outside_the_graph_get_no_route(self):
+        # About 2 km south of the grid
+        self.assertIsNone(routing.route(12.92, 50.80, EAST, NORTH))
+
+
+class RouteViewTests(SimpleTestCase):
+    def setUp(self):
+        routing.reset_router()
+        self.addCleanup(routing.reset_router)
+
+    def get(self, params):
+        request = APIRequestFactory().get('/route/', params)
+        force_authenticate(request, user=User(id=1, username='route-test'))
+        return route_view(request)
+
+    @override_settings(ROUTING_GRAPH_FILE=None)
+    def test_without_a_graph_the_route_is_unavailable(self):
+        response = self.get({'from': f'{WEST},{SOUTH}', 'to': f'{EAST},{NORTH}'})
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.data['code'], 'NoGraph')
+
+    @override_settings(ROUTING_GRAPH_FILE=str(SAMPLE_GRAPH))
+    def test_route_in_osrm_shape(self):
+        response = self.get({'from': f'{WEST},{SOUTH}', 'to': f'{EAST},{SOUTH}'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['code'], 'Ok')
+        self.assertEqual(response.data['routes'][0]['geometry']['type'], 'LineString')
+
+    @override_settings(ROUTING_GRAPH_FILE=str(SAMPLE_GRAPH))
+    def test_far_away_points_are_not_found(self):
+        response = self.get({'from': '12.92,50.80', 'to': f'{EAST},{SOUTH}'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_malformed_points_are_rejected(self):
+        response = self.get({'from': 'nowhere', 'to': f'{EAST},{SOUTH}'})
+        self.assertEqual(response.status_code, 400)
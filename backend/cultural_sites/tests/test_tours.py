@@ -0,0 +1,78 @@
+import numpy as np
+from django.test import SimpleTestCase
+
+from cultural_sites.tours import CoordinateStore, nearest_neighbour_order, plan_tour, tour_length, two_opt
+
+# Corners of a 2.1 x 1 km rectangle in central Chemnitz, counter-clockwise
+RECTANGLE = {1: (12.9, 50.83), 2: (12.93, 50.83), 3: (12.93, 50.839), 4: (12.9, 50.839)}
+
+
+def store_for(points):
+    ids = list(points)
+    return CoordinateStore(ids, [points[i][0] for i in ids], [points[i][1] for i in ids])
+
+
+class TwoOptTests(SimpleTestCase):
+    def setUp(self):
+        self.store = store_for(RECTANGLE)
+        self.matrix = self.store.distance_matrix(list(RECTANGLE))
+
+    def test_uncrosses_a_crossed_tour(self):
+        crossed = np.array([0, 2, 1, 3])
+        for round_trip in (False, True):
+            with self.subTest(round_trip=round_trip):
+                order = two_opt(crossed, self.matrix, round_trip)
+                self.assertEqual(order[0], 0)
+                self.assertLess(tour_length(order, self.matrix, round_trip), tour_length(crossed, self.matrix, round_trip))
+                self.assertIn(order.tolist(), ([0, 1, 2, 3], [0, 3, 2, 1]))
+
+    def test_never_lengthens_a_tour(self):
+        rng = np.random.default_rng(7)
+        lons, lats = 12.85 + rng.random(30) * 0.15, 50.78 + rng.random(30) * 0.1
+        store = CoordinateStore(range(30), lons, lats)
+        matrix = store.distance_matrix(list(range(30)))
+        for round_trip in (False, True):
+            start = nearest_neighbour_order(matrix)
+            order = two_opt(start, matrix, round_trip)
+            self.assertEqual(sorted(order.tolist()), list(range(30)))
+            self.assertEqual(order[0], start[0])
+            self.assertLessEqual(tour_length(order, matrix, round_trip), tour_length(start, matrix, round_trip) + 1e-6)
+
+    def test_input_is_not_modified(self):
+        crossed = np.array([0, 2, 1, 3])
+        two_opt(crossed, self.matrix)
+        self.assertEqual(crossed.tolist(), [0, 2, 1, 3])
+
+    def test_short_tours_are_unchanged(self):
+        order = np.array([0, 2, 1])
+        self.assertEqual(two_opt(order, self.matrix).tolist(), [0, 2, 1])
+
+
+class PlanTourTests(SimpleTestCase):
+    def setUp(self):
+        self.store = store_for(RECTANGLE)
+
+    def test_starts_at_first_stop_and_visits_all_once(self):
+        ids, meters = plan_tour(self.store, [3, 1, 4, 2, 1])
+        self.assertEqual(ids[0], 3)
+        self.assertEqual(sorted(ids), [1, 2, 3, 4])
+        # Down the short side, along the long one and back up
+        self.assertEqual(ids, [3, 2, 1, 4])
+        width, height = self.sides()
+        self.assertAlmostEqual(meters, width + 2 * height, delta=1)
+
+    def sides(self):
+        matrix = self.store.distance_matrix([1, 2, 3])
+        return matrix[0, 1], matrix[1, 2]
+
+    def test_round_trip_returns_to_start(self):
+        ids, meters = plan_tour(self.store, [1, 3, 2, 4], round_trip=True)
+        self.assertEqual(ids[0], 1)
+        # No diagonals: the opposite corner is visited second-to-last
+        self.assertEqual(ids[2], 3)
+        width, height = self.sides()
+        self.assertAlmostEqual(meters, 2 * (width + height), delta=1)
+
+    def test_unknown_location(self):
+        with self.assertRaises(KeyError):
+            plan_tour(self.store, [1, 99])
@@ -0,0 +1,53 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import connections, router
+
+from .caching import get_dataset_version
+from .models import Location
+from .viewport import MAX_ZOOM
+
+MVT_CONTENT_TYPE = 'application/vnd.mapbox-vector-tile'
+LAYER_NAME = 'locations'
+
+# ST_TileEnvelope works in EPSG:3857; the points are stored in EPSG:4326,
+# so the envelope is transformed once per query to hit the GiST index.
+TILE_SQL = f"""
+    WITH bounds AS (
+        SELECT ST_TileEnvelope(%s, %s, %s) AS geom
+    ),
+    features AS (
+        SELECT
+            ST_AsMVTGeom(ST_Transform(l.geometry, 3857), bounds.geom) AS geom,
+            l.id, l.name, l.tourism, l.amenity, l.landuse, l.wheelchair
+        FROM {Location._meta.db_table} l, bounds
+        WHERE l.geometry && ST_Transform(bounds.geom, 4326)
+    )
+    SELECT ST_AsMVT(features.*, '{LAYER_NAME}', 4096, 'geom') FROM features
+"""
+
+
+def get_tile_cache():
+    return caches[getattr(settings, 'LOCATION_TILE_CACHE', 'default')]
+
+
+def is_valid_tile(z, x, y):
+    return 0 <= z <= MAX_ZOOM and 0 <= x < 2 ** z and 0 <= y < 2 ** z
+
+
+def render_tile(z, x, y):
+    # Raw SQL skips the database routers, so ask them for the Location alias
+    with connections[router.db_for_read(Location)].cursor() as cursor:
+        cursor.execute(TILE_SQL, [z, x, y])
+        row = cursor.fetchone()
+    return bytes(row[0]) if row and row[0] else b''
+
+
+def get_tile(z, x, y):
+    cache = get_tile_cache()
+    # Keyed by dataset version, so any Location write invalidates all tiles
+    key = f'mvt:{get_dataset_version()}:{z}:{x}:{y}'
+    tile = cache.get(key)
+    if tile is None:
+        tile = render_tile(z, x, y)
+        cache.set(key, tile, timeout=getattr(settings, 'LOCATION_TILE_CACHE_TIMEOUT', 60 * 60 * 24))
+    return tile
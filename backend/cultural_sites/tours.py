@@ -0,0 +1,133 @@
+"""
+Multi-stop tour planning over location coordinates.
+
+Coordinates of all locations are held in NumPy arrays (radians), reloaded
+whenever the dataset version moves on. A tour request slices the stops out
+of those arrays, builds their great-circle distance matrix in one vectorized
+step and orders them with nearest neighbour followed by 2-opt.
+"""
+import threading
+
+import numpy as np
+
+from .caching import get_dataset_version
+
+EARTH_RADIUS = 6371008.8
+MAX_TWO_OPT_PASSES = 50
+
+
+class CoordinateStore:
+    def __init__(self, ids=(), lons=(), lats=()):
+        # Dataset version the coordinates were loaded at
+        self.version = None
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.lons = np.radians(np.asarray(lons, dtype=np.float64))
+        self.lats = np.radians(np.asarray(lats, dtype=np.float64))
+        self.rows = {int(location_id): row for row, location_id in enumerate(self.ids)}
+
+    @classmethod
+    def from_database(cls):
+        from .models import Location
+
+        rows = Location.objects.values_list('id', 'geometry')
+        ids, lons, lats = [], [], []
+        for location_id, geometry in rows.iterator(chunk_size=5000):
+            ids.append(location_id)
+            lons.append(geometry.x)
+            lats.append(geometry.y)
+        return cls(ids, lons, lats)
+
+    def distance_matrix(self, location_ids):
+        """Pairwise great-circle distances in meters; raises KeyError for unknown ids."""
+        rows = np.array([self.rows[location_id] for location_id in location_ids], dtype=np.int64)
+        lons, lats = self.lons[rows], self.lats[rows]
+        dlat = lats[:, None] - lats[None, :]
+        dlon = lons[:, None] - lons[None, :]
+        a = np.sin(dlat / 2) ** 2 + np.cos(lats)[:, None] * np.cos(lats)[None, :] * np.sin(dlon / 2) ** 2
+        return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0.0, 1.0)))
+
+
+def nearest_neighbour_order(matrix, start=0):
+    n = len(matrix)
+    order = [start]
+    visited = np.zeros(n, dtype=bool)
+    visited[start] = True
+    for _ in range(n - 1):
+        distances = np.where(visited, np.inf, matrix[order[-1]])
+        nxt = int(np.argmin(distances))
+        order.append(nxt)
+        visited[nxt] = True
+    return np.array(order, dtype=np.int64)
+
+
+def two_opt(order, matrix, round_trip=False):
+    """
+    Improve ``order`` by reversing segments while that shortens the tour.
+    The first stop stays fixed. Each pass evaluates every ``j`` for a given
+    ``i`` at once with NumPy.
+    """
+    order = order.copy()
+    n = len(order)
+    if n < 4:
+        return order
+    for _ in range(MAX_TWO_OPT_PASSES):
+        improved = False
+        for i in range(1, n - 1):
+            a, b = order[i - 1], order[i]
+            js = np.arange(i + 1, n)
+            c = order[js]
+            if round_trip:
+                d = order[(js + 1) % n]
+                delta = matrix[a, c] + matrix[b, d] - matrix[a, b] - matrix[c, d]
+            else:
+                # The last stop has no successor in an open tour
+                has_next = js + 1 < n
+                d = order[np.minimum(js + 1, n - 1)]
+                delta = matrix[a, c] - matrix[a, b] + np.where(has_next, matrix[b, d] - matrix[c, d], 0.0)
+            best = int(np.argmin(delta))
+            if delta[best] < -1e-9:
+                j = int(js[best])
+                order[i:j + 1] = order[i:j + 1][::-1]
+                improved = True
+        if not improved:
+            break
+    return order
+
+
+def tour_length(order, matrix, round_trip=False):
+    length = float(matrix[order[:-1], order[1:]].sum())
+    if round_trip and len(order) > 1:
+        length += float(matrix[order[-1], order[0]])
+    return length
+
+
+def plan_tour(store, location_ids, round_trip=False):
+    """Return ``(ordered_ids, meters)``; the first id is the fixed starting point."""
+    location_ids = list(dict.fromkeys(location_ids))
+    matrix = store.distance_matrix(location_ids)
+    order = two_opt(nearest_neighbour_order(matrix), matrix, round_trip)
+    return [location_ids[i] for i in order], tour_length(order, matrix, round_trip)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_coordinate_store():
+    """
+    Return the process-wide store, reloaded from the database whenever the
+    dataset version has moved on (writes by any process or an import).
+    """
+    global _store
+    version = get_dataset_version()
+    if _store is None or _store.version != version:
+        # One thread reloads, the others keep using the current store
+        if _store_lock.acquire(blocking=_store is None):
+            try:
+                if _store is None or _store.version != version:
+                    store = CoordinateStore.from_database()
+                    store.version = version
+                    _store = store
+            finally:
+                _store_lock.release()
+    return _store
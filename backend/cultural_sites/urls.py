@@ -1,6 +1,13 @@
 
+from django.conf import settings
 from django.urls import path
-from .views import  CustomTokenObtainPairView,CustomTokenRefreshView,logout,is_authenticated,register,location_list,location,get_logged_in_user,delete_user,add_to_favorites,remove_from_favorites,list_favorites
+from .health import database_health
+from .views import  CustomTokenObtainPairView,CustomTokenRefreshView,logout,is_authenticated,register,location_list,location,get_logged_in_user,delete_user,add_to_favorites,remove_from_favorites,list_favorites,location_clusters,location_tile,location_autocomplete,nearby_locations,route_view,plan_tour_view,add_favorites_batch,remove_favorites_batch,list_favorite_ids,location_facets,location_bundle
+
+# ASGI deployments serve the hot read endpoints from async views
+if getattr(settings, 'ASYNC_READ_VIEWS', False):
+    from .async_views import is_authenticated, get_logged_in_user, list_favorites, location
+
 urlpatterns = [
     
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
@@ -10,10 +17,22 @@ urlpatterns = [
     path('register/',register),
     path('location/', location_list, name='location'),
     path('locations/', location, name='locations'),
+    path('clusters/', location_clusters, name='location_clusters'),
+    path('facets/', location_facets, name='location_facets'),
+    path('bundle/', location_bundle, name='location_bundle'),
+    path('nearby/', nearby_locations, name='nearby_locations'),
+    path('route/', route_view, name='route'),
+    path('tour/', plan_tour_view, name='plan_tour'),
+    path('search/autocomplete/', location_autocomplete, name='location_autocomplete'),
+    path('tiles/<int:z>/<int:x>/<int:y>.mvt', location_tile, name='location_tile'),
+    path('health/db/', database_health, name='database_health'),
     path('user-info/',get_logged_in_user,name='user_info'),
     path('delete/',delete_user,name='delete'),
     path('add/',add_to_favorites,name='add_to_favorites'),
     path('remove/<int:location_id>/', remove_from_favorites, name='remove_from_favorites'),
-    path('list/',list_favorites,name='list_favorites')
+    path('list/',list_favorites,name='list_favorites'),
+    path('list/ids/',list_favorite_ids,name='list_favorite_ids'),
+    path('add/batch/',add_favorites_batch,name='add_favorites_batch'),
+    path('remove/batch/',remove_favorites_batch,name='remove_favorites_batch'),
     
 ]
\ No newline at end of file
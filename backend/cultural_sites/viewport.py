@@ -0,0 +1,90 @@
+from django.conf import settings
+from django.contrib.gis.geos import Polygon
+from django.db.models import F, FloatField, Func, Value, Window
+from django.db.models.functions import Floor, RowNumber
+
+MIN_ZOOM = 0
+MAX_ZOOM = 22
+# A capped viewport is split into this many cells per axis and filled
+# round-robin from them, so the returned points cover the whole map
+SAMPLE_GRID_SIZE = 16
+
+
+def parse_bbox(value):
+    """Parse ``minLon,minLat,maxLon,maxLat`` into a WGS84 polygon."""
+    try:
+        min_lon, min_lat, max_lon, max_lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('bbox must be "minLon,minLat,maxLon,maxLat"')
+
+    if min_lon > max_lon or min_lat > max_lat:
+        raise ValueError('bbox min values must not exceed max values')
+    if not (-180 <= min_lon <= 180 and -180 <= max_lon <= 180):
+        raise ValueError('bbox longitudes must be between -180 and 180')
+    if not (-90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise ValueError('bbox latitudes must be between -90 and 90')
+
+    bbox = Polygon.from_bbox((min_lon, min_lat, max_lon, max_lat))
+    bbox.srid = 4326
+    return bbox
+
+
+def parse_zoom(value):
+    try:
+        zoom = int(value)
+    except (TypeError, ValueError):
+        raise ValueError('zoom must be an integer')
+    if not MIN_ZOOM <= zoom <= MAX_ZOOM:
+        raise ValueError(f'zoom must be between {MIN_ZOOM} and {MAX_ZOOM}')
+    return zoom
+
+
+def max_features_for_zoom(zoom):
+    """The LOCATION_VIEWPORT_MAX_FEATURES entry with the highest zoom <= ``zoom``."""
+    caps = settings.LOCATION_VIEWPORT_MAX_FEATURES
+    cap = None
+    for level in sorted(caps):
+        if level > zoom:
+            break
+        cap = caps[level]
+    return cap
+
+
+def filter_viewport(locations, bbox, zoom=None):
+    """
+    Restrict ``locations`` to the points inside ``bbox``.
+
+    ``geometry__contained`` compiles to the ``@`` bounding-box operator, which
+    PostGIS answers from the GiST index on ``Location.geometry``.
+    Returns the filtered queryset and the feature cap for ``zoom``; a capped
+    queryset is ordered by ``spread_over_viewport``.
+    """
+    locations = locations.filter(geometry__contained=bbox)
+    cap = max_features_for_zoom(zoom) if zoom is not None else None
+    if cap is not None:
+        locations = spread_over_viewport(locations, bbox)
+    return locations, cap
+
+
+def spread_over_viewport(locations, bbox, grid_size=SAMPLE_GRID_SIZE):
+    """
+    Reorder ``locations`` so any prefix is spread over ``bbox``: the first
+    row of every grid cell, then the second of every cell, and so on. Within
+    a cell the existing ordering (name or search rank) decides. Taking the
+    first N rows is then a spatial sample rather than an alphabetical slice.
+    """
+    min_lon, min_lat, max_lon, max_lat = bbox.extent
+    cell_width = max((max_lon - min_lon) / grid_size, 1e-9)
+    cell_height = max((max_lat - min_lat) / grid_size, 1e-9)
+    lon = Func(F('geometry'), function='ST_X', output_field=FloatField())
+    lat = Func(F('geometry'), function='ST_Y', output_field=FloatField())
+    cell = [
+        Floor((lon - Value(min_lon)) / Value(cell_width)),
+        Floor((lat - Value(min_lat)) / Value(cell_height)),
+    ]
+    within_cell = [*locations.query.order_by, 'id']
+    return locations.annotate(
+        viewport_rank=Window(RowNumber(), partition_by=cell, order_by=within_cell),
+        viewport_cell_x=cell[0],
+        viewport_cell_y=cell[1],
+    ).order_by('viewport_rank', 'viewport_cell_y', 'viewport_cell_x', 'id')
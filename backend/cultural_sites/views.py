@@ -1,11 +1,35 @@
-from django.shortcuts import render
-from django.contrib.auth.models import User
+from django.conf import settings
 from .models import Location,Favorite
 from .serializers import UserRegisterSerializer,LocationSerializer
-from rest_framework.decorators import api_view, permission_classes
+from .authentication import read_only_authentication_classes
+from .viewport import parse_bbox, parse_zoom, filter_viewport
+from .clustering import cluster_features
+from .tiles import MVT_CONTENT_TYPE, is_valid_tile, get_tile
+from .geojson import GeoJSONResponse, add_flag, feature_values, feature_collection, stream_feature_collection
+from .pagination import keyset_page, parse_page_size
+from .caching import cached_feed
+from .search import search_locations
+from .routers import replica_reads
+from .categories import facet_counts
+from .opening_hours import filter_open_at, parse_open_at
+from .bundles import BUNDLE_CONTENT_TYPE, export_bundle
+from .normalization import normalize_code
+from .suggestions import get_suggestion_index
+from .nearby import parse_nearby_params, nearest_locations
+from .routing import RoutingUnavailable, route
+from .tours import get_coordinate_store, plan_tour
+from .favorites import (
+    MAX_BATCH_SIZE as MAX_FAVORITES_BATCH_SIZE,
+    add_favorites,
+    get_favorite_ids,
+    get_favorites,
+    remove_favorites,
+)
+from rest_framework.decorators import api_view, permission_classes, authentication_classes
 from rest_framework.permissions import IsAuthenticated,AllowAny
 from rest_framework.response import Response
-from django.db.models import Q
+from django.http import HttpResponse, Http404, JsonResponse, StreamingHttpResponse
+from django.views.decorators.http import require_GET
 from rest_framework import status
 # Create your views here.
 
@@ -75,6 +99,7 @@ class CustomTokenRefreshView(TokenRefreshView):
 
 
 @api_view(['POST'])
+@authentication_classes(read_only_authentication_classes())
 @permission_classes([IsAuthenticated])
 def is_authenticated(request):
     return Response({'success':True})
@@ -119,11 +144,29 @@ def logout(request):
 
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def location_list(request):
     if request.method == 'GET':
         locations = Location.objects.all()
-        serializer = LocationSerializer(locations, many=True)
-        return Response(serializer.data)
+        if request.GET.get('stream') in ('1', 'true'):
+            # Rows come from a server-side cursor and leave as they are encoded
+            rows = feature_values(locations.order_by('id')).iterator(
+                chunk_size=getattr(settings, 'LOCATION_STREAM_CHUNK_SIZE', 2000)
+            )
+            return StreamingHttpResponse(stream_feature_collection(rows), content_type='application/json')
+        if 'cursor' in request.GET or 'page_size' in request.GET:
+            try:
+                page_size = parse_page_size(request.GET.get('page_size'))
+                rows, next_cursor = keyset_page(locations, request.GET.get('cursor'), page_size)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=400)
+            data = feature_collection(rows)
+            data["next_cursor"] = next_cursor
+            return GeoJSONResponse(data)
+        return cached_feed(
+            request, 'location_list',
+            lambda: GeoJSONResponse(feature_collection(feature_values(locations)))
+        )
 
     elif request.method == 'POST':
         serializer = LocationSerializer(data=request.data)
@@ -140,60 +183,74 @@ def delete_user(request):
     user.delete()
     return Response({"message": "User deleted successfully."}, status=status.HTTP_204_NO_CONTENT)
 
+
+WHEELCHAIR_FILTERS = {'true': 'yes', 'limited': 'limited', 'false': 'no'}
+
+
+def parse_tag_filter(value):
+    """
+    Split a ``tag`` parameter into ``(key, value)`` at the first '=':
+    "diet:vegan=yes" is key "diet:vegan" with value "yes". A bare key, colons
+    included ("addr:street"), gives ``(key, None)``: has the tag at all.
+    """
+    if '=' in value:
+        key, tag_value = value.split('=', 1)
+        return key, tag_value
+    return value, None
+
+
+def filter_locations(locations, params):
+    # Get query parameters for filtering
+    location_type = params.get('type', None)
+    search_query = params.get('search', None)
+    city = params.get('city', None)
+    wheelchair_accessible = params.get('wheelchair', None)
+    tags = [value.strip() for value in params.getlist('tag') if value.strip()]
+    open_at = params.get('open_at', None)
+
+    # Filter by type (amenity, tourism, landuse), exact match on the normalized codes
+    if location_type:
+        locations = locations.filter(categories__contains=[normalize_code(location_type)])
+
+    # Filter by search query (name or address), ranked by trigram similarity
+    if search_query:
+        locations = search_locations(locations, search_query)
+
+    # Filter by city
+    if city:
+        locations = locations.filter(city_code=normalize_code(city))
+
+    # Filter by wheelchair accessibility ('false' also matches untagged locations)
+    if wheelchair_accessible:
+        code = WHEELCHAIR_FILTERS.get(wheelchair_accessible.lower())
+        if code:
+            locations = locations.filter(wheelchair_code=code)
+
+    # Filter by OSM tags, e.g. tag=diet:vegan=yes; all given tags must match
+    for tag in tags:
+        key, tag_value = parse_tag_filter(tag)
+        if tag_value is None:
+            locations = locations.filter(tags__has_key=key)
+        else:
+            # Containment (@>), answered by the GIN index on tags
+            locations = locations.filter(tags__contains={key: tag_value})
+
+    # Filter by opening hours, e.g. open_at=2025-06-14T18:30; raises ValueError when malformed
+    if open_at:
+        locations = filter_open_at(locations, parse_open_at(open_at))
+
+    return locations
+
+
 @api_view(['GET', 'POST'])
 @permission_classes([IsAuthenticated])
+@replica_reads
 def location(request):
     if request.method == 'GET':
-        # Get query parameters for filtering
-        location_type = request.GET.get('type', None)
-        search_query = request.GET.get('search', None)
-        city = request.GET.get('city', None)
-        wheelchair_accessible = request.GET.get('wheelchair', None)
-        
-        # Start with all locations
-        locations = Location.objects.all()
-        
-        # Filter by type (amenity, tourism, landuse)
-        if location_type:
-            locations = locations.filter(
-                Q(amenity__icontains=location_type) |
-                Q(tourism__icontains=location_type) |
-                Q(landuse__icontains=location_type)
-                
-            )
-        
-        # Filter by search query (name or address)
-        if search_query:
-            locations = locations.filter(
-                Q(name__icontains=search_query) |
-                Q(addr_street__icontains=search_query) |
-                Q(addr_city__icontains=search_query)
-            )
-        
-        # Filter by city
-        if city:
-            locations = locations.filter(addr_city__iexact=city)
-        
-        # Filter by wheelchair accessibility
-        if wheelchair_accessible:
-            if wheelchair_accessible.lower() == 'true':
-                locations = locations.filter(wheelchair='yes')
-            elif wheelchair_accessible.lower() == 'limited':
-                locations = locations.filter(wheelchair='limited')
-            elif wheelchair_accessible.lower() == 'false':
-                locations = locations.filter(
-                    Q(wheelchair='no') | Q(wheelchair__isnull=True)
-                )
-        
-        # Order by name for consistent results
-        locations = locations.order_by('name')
-        
-        serializer = LocationSerializer(locations, many=True)
-        "return Response(serializer.data)"
-        return Response({
-            "type": "FeatureCollection",
-            "features": serializer.data
-        })
+        personalize = None
+        if request.GET.get('include_favorite', None) in ('1', 'true'):
+            personalize = favorites_overlay(get_favorite_ids(request.user.id))
+        return cached_feed(request, 'locations', lambda: location_feed(request), personalize=personalize)
 
     elif request.method == 'POST':
         serializer = LocationSerializer(data=request.data)
@@ -201,12 +258,264 @@ def location(request):
             serializer.save()
             return Response(serializer.data, status=201)
         return Response(serializer.errors, status=400)
-    
+
+
+def favorites_overlay(favorite_ids):
+    """
+    ``cached_feed`` personalization flagging the caller's favorites in the
+    shared feed, so the feed itself is cached once for all users. The flags
+    are spliced into the cached body at its feature index.
+    """
+    def mark_favorites(body, feature_index):
+        return add_flag(body, feature_index, 'is_favorite', favorite_ids)
+
+    return f'favorites:{sorted(favorite_ids)}', mark_favorites
+
+
+def location_feed(request):
+    try:
+        rows, viewport, cap = location_feed_rows(request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    data = location_feed_data(list(rows), viewport, cap)
+    return GeoJSONResponse(data, indexed=data["features"])
+
+
+def location_feed_rows(params):
+    """
+    The ``feature_values`` queryset of the feed, whether it is a viewport
+    request, and the viewport's feature cap. Raises ValueError for a bad
+    bbox/zoom/open_at.
+    """
+    locations = filter_locations(Location.objects.all(), params)
+
+    # Order by name for consistent results, best search matches first
+    if 'search_rank' in locations.query.annotations:
+        locations = locations.order_by('-search_rank', 'name')
+    else:
+        locations = locations.order_by('name')
+
+    # Viewport mode: only return the points inside the map bounds
+    bbox = params.get('bbox', None)
+    zoom = params.get('zoom', None)
+    viewport = bool(bbox)
+    cap = None
+    if viewport:
+        bbox = parse_bbox(bbox)
+        zoom = parse_zoom(zoom) if zoom is not None else None
+        locations, cap = filter_viewport(locations, bbox, zoom)
+
+    rows = feature_values(locations)
+    if cap is not None:
+        # Fetch one extra row to know whether the cap was hit
+        rows = rows[:cap + 1]
+    return rows, viewport, cap
+
+
+def location_feed_data(rows, viewport, cap):
+    truncated = None
+    if viewport:
+        truncated = cap is not None and len(rows) > cap
+        if truncated:
+            rows = rows[:cap]
+
+    # Bulk path, same output as LocationSerializer(locations, many=True).data
+    features = feature_collection(rows)
+
+    data = {
+        "type": "FeatureCollection",
+        "features": features
+    }
+    if truncated is not None:
+        data["truncated"] = truncated
+    return data
+
+
+@api_view(['GET'])
+@authentication_classes(read_only_authentication_classes())
+@permission_classes([IsAuthenticated])
+@replica_reads
+def nearby_locations(request):
+    try:
+        lon, lat, limit, radius = parse_nearby_params(request.GET)
+        # Same category/accessibility filters as the map feed
+        locations = filter_locations(Location.objects.all(), request.GET)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    locations = nearest_locations(locations, lon, lat, radius)
+    rows = feature_values(locations, 'distance')[:limit]
+    return GeoJSONResponse(feature_collection(rows, extra=('distance',)))
+
+
+def parse_lon_lat(value):
+    try:
+        lon, lat = (float(part) for part in value.split(','))
+    except (AttributeError, ValueError):
+        raise ValueError('from and to must be "lon,lat"')
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        raise ValueError('lon/lat out of range')
+    return lon, lat
+
+
+@api_view(['GET'])
+@authentication_classes(read_only_authentication_classes())
+@permission_classes([IsAuthenticated])
+def route_view(request):
+    try:
+        from_lon, from_lat = parse_lon_lat(request.GET.get('from', None))
+        to_lon, to_lat = parse_lon_lat(request.GET.get('to', None))
+    except ValueError as e:
+        return Response({'code': 'InvalidQuery', 'error': str(e)}, status=400)
+
+    try:
+        result = route(from_lon, from_lat, to_lon, to_lat)
+    except (OSError, RoutingUnavailable):
+        # Clients fall back to an external router
+        return Response({'code': 'NoGraph', 'error': 'Routing graph is not available'}, status=503)
+    if result is None:
+        return Response({'code': 'NoRoute', 'error': 'No route found'}, status=404)
+
+    # Same shape as an OSRM /route response so clients can switch over as is
+    return Response({'code': 'Ok', 'routes': [result]})
+
+
+BOOLEAN_VALUES = {'true': True, '1': True, 'false': False, '0': False}
+
+
+def parse_bool(value, name):
+    """JSON booleans, 0/1 and the strings "true"/"false"/"1"/"0"; ValueError otherwise."""
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, (int, str)) and str(value).strip().lower() in BOOLEAN_VALUES:
+        return BOOLEAN_VALUES[str(value).strip().lower()]
+    raise ValueError(f'{name} must be true or false')
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def plan_tour_view(request):
+    location_ids = request.data.get('location_ids', None)
+    try:
+        round_trip = parse_bool(request.data.get('round_trip', False), 'round_trip')
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    # Without explicit ids, plan a tour through the user's favorites
+    if location_ids is None:
+        location_ids = [favorite['id'] for favorite in get_favorites(request.user.id)]
+    if not isinstance(location_ids, list) or not all(isinstance(i, int) for i in location_ids):
+        return Response({'error': 'location_ids must be a list of integers'}, status=400)
+    if len(location_ids) > settings.TOUR_MAX_STOPS:
+        return Response({'error': f'At most {settings.TOUR_MAX_STOPS} stops are allowed'}, status=400)
+    if not location_ids:
+        return Response({'order': [], 'distance': 0.0, 'locations': []})
+
+    try:
+        order, distance = plan_tour(get_coordinate_store(), location_ids, round_trip)
+    except KeyError as e:
+        return Response({'error': f'Location {e.args[0]} not found'}, status=404)
+
+    names = dict(Location.objects.filter(id__in=order).values_list('id', 'name'))
+    return Response({
+        'order': order,
+        'distance': round(distance, 1),
+        'locations': [{'id': location_id, 'name': names.get(location_id)} for location_id in order],
+    })
+
+
+@api_view(['GET'])
+@authentication_classes(read_only_authentication_classes())
+@permission_classes([IsAuthenticated])
+@replica_reads
+def location_autocomplete(request):
+    query = request.GET.get('q', '')
+    try:
+        limit = int(request.GET.get('limit', 10))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=400)
+    # Served from the in-memory prefix index, no database round trip
+    return Response(get_suggestion_index().search(query, limit))
+
+
+@api_view(['GET'])
+@authentication_classes(read_only_authentication_classes())
+@permission_classes([IsAuthenticated])
+@replica_reads
+def location_facets(request):
+    return cached_feed(request, 'facets', lambda: location_facet_counts(request))
+
+
+def location_facet_counts(request):
+    try:
+        locations = filter_locations(Location.objects.all(), request.GET)
+        bbox = request.GET.get('bbox', None)
+        if bbox:
+            locations, _ = filter_viewport(locations, parse_bbox(bbox))
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+    return JsonResponse(facet_counts(locations))
+
+
+@api_view(['GET'])
+@authentication_classes(read_only_authentication_classes())
+@permission_classes([IsAuthenticated])
+@replica_reads
+def location_bundle(request):
+    since = request.GET.get('since', None)
+    with_spatial_index = request.GET.get('spatial_index', '1') not in ('0', 'false')
+
+    def build():
+        try:
+            data, _ = export_bundle(since=since, with_spatial_index=with_spatial_index)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=400)
+        except LookupError as e:
+            # Base snapshot not known here: the client has to fetch a full bundle
+            return Response({'error': str(e)}, status=404)
+        return HttpResponse(data, content_type=BUNDLE_CONTENT_TYPE)
+
+    return cached_feed(request, 'bundle', build, variant=f'since:{since}:index:{with_spatial_index}')
+
+
+@api_view(['GET'])
+@authentication_classes(read_only_authentication_classes())
+@permission_classes([IsAuthenticated])
+@replica_reads
+def location_clusters(request):
+    try:
+        zoom = parse_zoom(request.GET.get('zoom', None))
+        bbox = request.GET.get('bbox', None)
+        extent = parse_bbox(bbox).extent if bbox else None
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response({
+        "type": "FeatureCollection",
+        "features": cluster_features(zoom, extent)
+    })
+
+
+# Plain Django view: tiles carry public OSM data and are meant to be cached
+# by a reverse proxy, so they skip the DRF cookie authentication.
+@require_GET
+@replica_reads
+def location_tile(request, z, x, y):
+    if not is_valid_tile(z, x, y):
+        raise Http404('Tile out of range')
+
+    response = HttpResponse(get_tile(z, x, y), content_type=MVT_CONTENT_TYPE)
+    response['Cache-Control'] = 'public, max-age=3600'
+    return response
+
 
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_to_favorites(request):
     location_id = request.data.get('location_id')
+    # Answered from the cached favorites when there is nothing to write
+    if location_id in get_favorite_ids(request.user.id):
+        return Response({'message': 'Already in favorites'}, status=200)
     try:
         location = Location.objects.get(id=location_id)
         favorite, created = Favorite.objects.get_or_create(user=request.user, location=location)
@@ -219,26 +528,54 @@ def add_to_favorites(request):
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def remove_from_favorites(request, location_id):
-    try:
-        location = Location.objects.get(id=location_id)
-        fav = Favorite.objects.get(user=request.user, location=location)
-        fav.delete()
+    if remove_favorites(request.user, [location_id]):
         return Response({'message': 'Removed from favorites'})
-    except Location.DoesNotExist:
+    # Nothing deleted: tell a missing location apart from a missing favorite
+    if not Location.objects.filter(id=location_id).exists():
         return Response({'error': 'Location not found'}, status=404)
-    except Favorite.DoesNotExist:
-        return Response({'error': 'Favorite not found'}, status=404)
-    
+    return Response({'error': 'Favorite not found'}, status=404)
+
+
+def parse_location_ids(data):
+    location_ids = data.get('location_ids', None)
+    if not isinstance(location_ids, list) or not all(isinstance(i, int) for i in location_ids):
+        raise ValueError('location_ids must be a list of integers')
+    if len(location_ids) > MAX_FAVORITES_BATCH_SIZE:
+        raise ValueError(f'At most {MAX_FAVORITES_BATCH_SIZE} location_ids per request')
+    return location_ids
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def add_favorites_batch(request):
+    try:
+        location_ids = parse_location_ids(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    added, missing = add_favorites(request.user, location_ids)
+    return Response({'added': added, 'missing': missing}, status=201 if added else 200)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def remove_favorites_batch(request):
+    try:
+        location_ids = parse_location_ids(request.data)
+    except ValueError as e:
+        return Response({'error': str(e)}, status=400)
+
+    return Response({'removed': remove_favorites(request.user, location_ids)})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def list_favorites(request):
-    favorites = Favorite.objects.filter(user=request.user).select_related('location')
-    data = [
-        {
-            'id': fav.location.id,
-            'name': fav.location.name,
-            'osm_id': fav.location.osm_id,
-        }
-        for fav in favorites
-    ]
-    return Response(data)
+    return Response(get_favorites(request.user.id))
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def list_favorite_ids(request):
+    # Lets the map mark favorites on every marker from a single cached set
+    return Response(sorted(get_favorite_ids(request.user.id)))
@@ -26,7 +26,13 @@ from django.core.exceptions import ValidationError
 from cultural_sites.models import *  # Adjust based on your actual models
 
 def load_geojson_to_postgres(geojson_file_path, model_class=None):
-    
+    """
+    Import the file with ``model_class`` (see ``import_with_content_hashes``),
+    or without a model class just print its features.
+    """
+    if model_class is not None:
+        return import_with_content_hashes(geojson_file_path, model_class)
+
     try:
         # Read GeoJSON file
         with open(geojson_file_path, 'r', encoding='utf-8') as file:
@@ -36,8 +42,7 @@ def load_geojson_to_postgres(geojson_file_path, model_class=None):
         print(f"📊 Total features: {len(geojson_data.get('features', []))}")
         
         # Process each feature
-        created_count = 0
-        updated_count = 0
+        shown_count = 0
         error_count = 0
         
         for i, feature in enumerate(geojson_data.get('features', [])):
@@ -58,66 +63,13 @@ def load_geojson_to_postgres(geojson_file_path, model_class=None):
                     print(f"⚠️  Feature {i+1}: Expected Point geometry, got {geos_geom.geom_type}, skipping")
                     continue
                 
-                # If no model class provided, just print the data
-                if model_class is None:
-                    print(f"\n🗺️  Feature {i+1}:")
-                    print(f"   Geometry Type: {geos_geom.geom_type}")
-                    print(f"   Coordinates: {geos_geom.coords}")
-                    print(f"   Properties: {properties}")
-                    created_count += 1
-                else:
-                    # Map GeoJSON properties to Location model fields
-                    instance_data = {
-                        'geometry': geos_geom,
-                        'osm_id': properties.get('osm_id') or properties.get('id') or f'generated_{i+1}',
-                        'name': properties.get('name'),
-                        'website': properties.get('website'),
-                        'operator': properties.get('operator'),
-                        'tourism': properties.get('tourism'),
-                        'wheelchair': properties.get('wheelchair'),
-                        'landuse': properties.get('landuse'),
-                        'wikidata': properties.get('wikidata'),
-                        'amenity': properties.get('amenity'),
-                    }
-                    
-                    # Clean the data - truncate strings that are too long
-                    if instance_data['osm_id'] and len(instance_data['osm_id']) > 100:
-                        instance_data['osm_id'] = instance_data['osm_id'][:100]
-                    
-                    for field in ['name', 'operator']:
-                        if instance_data[field] and len(instance_data[field]) > 255:
-                            instance_data[field] = instance_data[field][:255]
-                    
-                    for field in ['tourism', 'wheelchair', 'landuse', 'wikidata','amenity']:
-                        if instance_data[field] and len(instance_data[field]) > 100:
-                            instance_data[field] = instance_data[field][:100]
-                    
-                    # Try to get existing location by osm_id, or create new one
-                    location, created = model_class.objects.get_or_create(
-                        osm_id=instance_data['osm_id'],
-                        defaults=instance_data
-                    )
-                    
-                    if created:
-                        print(f"✅ Feature {i+1}: Created new Location '{location.name or location.osm_id}'")
-                        created_count += 1
-                    else:
-                        # Update existing location with new data
-                        updated_fields = []
-                        for field, value in instance_data.items():
-                            if field != 'osm_id' and value is not None:
-                                current_value = getattr(location, field)
-                                if current_value != value:
-                                    setattr(location, field, value)
-                                    updated_fields.append(field)
-                        
-                        if updated_fields:
-                            location.save()
-                            print(f"🔄 Feature {i+1}: Updated Location '{location.name or location.osm_id}' - fields: {', '.join(updated_fields)}")
-                            updated_count += 1
-                        else:
-                            print(f"ℹ️  Feature {i+1}: No changes for Location '{location.name or location.osm_id}'")
-                    
+                # No model class: just print the data
+                print(f"\n🗺️  Feature {i+1}:")
+                print(f"   Geometry Type: {geos_geom.geom_type}")
+                print(f"   Coordinates: {geos_geom.coords}")
+                print(f"   Properties: {properties}")
+                shown_count += 1
+
             except ValidationError as e:
                 print(f"❌ Feature {i+1}: Validation error - {e}")
                 error_count += 1
@@ -126,9 +78,8 @@ def load_geojson_to_postgres(geojson_file_path, model_class=None):
                 error_count += 1
         
         # Summary
-        print(f"\n📋 SUMMARY:")
-        print(f"   ✅ Created: {created_count}")
-        print(f"   🔄 Updated: {updated_count}")
+        print("\n📋 SUMMARY:")
+        print(f"   ✅ Shown: {shown_count}")
         print(f"   ❌ Errors: {error_count}")
         print(f"   📊 Total features processed: {len(geojson_data.get('features', []))}")
         
@@ -144,6 +95,50 @@ def load_geojson_to_postgres(geojson_file_path, model_class=None):
         print(f"❌ Unexpected error: {e}")
         return False
 
+def import_with_content_hashes(geojson_path, model_class):
+    """
+    Import through the bulk importer: only new or changed features are
+    written, unchanged ones are skipped by comparing content hashes.
+    ``geojson_path`` may be a directory; its files are parsed in parallel.
+    """
+    from cultural_sites.importer import import_files
+    from cultural_sites.management.commands.import_geojson import collect_files
+
+    if model_class is not Location:
+        print(f"❌ Only the Location model can be imported, got {model_class.__name__}")
+        return False
+
+    files = collect_files([geojson_path])
+    if not files:
+        print(f"❌ Error: no GeoJSON files found at {geojson_path}")
+        return False
+
+    def on_commit(total):
+        print(f"   {total.read} features read, {total.written} written ({total.rate:,.0f} features/s)")
+
+    def on_file_done(path, stats, error):
+        if error:
+            print(f"❌ {path}: {error}")
+        else:
+            print(f"✅ {path}: {stats.read} features, {stats.written} written, {stats.unchanged} unchanged, "
+                  f"{stats.skipped} skipped in {stats.elapsed:.1f}s ({stats.rate:,.0f} features/s)")
+
+    try:
+        writer = import_files(files, workers=min(len(files), os.cpu_count() or 1),
+                              on_commit=on_commit, on_file_done=on_file_done)
+    except Exception as e:
+        print(f"❌ Unexpected error: {e}")
+        return False
+
+    total = writer.total
+    print("\n📋 SUMMARY:")
+    print(f"   💾 Created/updated: {total.written}")
+    print(f"   ℹ️  Unchanged: {total.unchanged}")
+    print(f"   ⚠️  Skipped: {total.skipped}")
+    print(f"   ❌ Failed files: {len(writer.errors)}")
+    print(f"   📊 Total features processed: {total.read} in {total.elapsed:.1f}s ({total.rate:,.0f} features/s)")
+    return not writer.errors
+
 def show_model_field_mapping():
     """
     Show the field mapping for the Location model
@@ -200,10 +195,11 @@ def main():
     
     # Check command line arguments
     if len(sys.argv) < 2:
-        print("Usage: python import_geojson.py <path_to_geojson_file> [Location]")
+        print("Usage: python import_geojson.py <path_to_geojson_file_or_directory> [Location]")
         print("\nExamples:")
         print("  python import_geojson.py data/cultural_sites.geojson")
         print("  python import_geojson.py data/cultural_sites.geojson Location")
+        print("  python import_geojson.py data/extracts/ Location")
         print("\nIf no model name is provided, the script will just display the data.")
         show_model_field_mapping()
         return
@@ -0,0 +1,138 @@
+"""
+Load test of the hot read endpoints, to compare a WSGI and an ASGI deployment.
+
+Run the same code base twice, for example:
+
+    gunicorn backend.wsgi -w 4 --threads 8 -b 127.0.0.1:8000
+    ASYNC_READ_VIEWS=1 uvicorn backend.asgi:application --workers 4 --port 8001
+
+The ASGI run uses the psycopg connection pool by default (DB_POOL in
+settings.py), as persistent connections leak per async context under ASGI.
+Log in once (the access_token cookie of the browser or of `token/`), then:
+
+    python loadtest.py --target wsgi=http://127.0.0.1:8000 --target asgi=http://127.0.0.1:8001 \
+        --access-token <token> --concurrency 300 --duration 30
+
+Each endpoint is hit by --concurrency keep-alive connections for --duration
+seconds per target; requests per second and p50/p99 latency are printed.
+Only the standard library is needed.
+"""
+import argparse
+import asyncio
+import time
+from urllib.parse import urlsplit
+
+ENDPOINTS = [
+    ('GET', '/locations/'),
+    ('GET', '/list/'),
+    ('GET', '/user-info/'),
+    ('POST', '/authenticated/'),
+]
+
+
+async def read_response(reader):
+    """Read one HTTP/1.1 response; returns ``(status, keep_alive)``."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError('Connection closed')
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        while True:
+            size = int((await reader.readline()).split(b';')[0], 16)
+            await reader.readexactly(size + 2)
+            if size == 0:
+                break
+    elif 'content-length' in headers:
+        await reader.readexactly(int(headers['content-length']))
+    return status, headers.get('connection', '').lower() != 'close'
+
+
+async def connection_loop(url, method, path, access_token, deadline, latencies, errors):
+    host, port = url.hostname, url.port or 80
+    request = (
+        f'{method} {path} HTTP/1.1\r\n'
+        f'Host: {url.netloc}\r\n'
+        f'Cookie: access_token={access_token}\r\n'
+        f'Accept-Encoding: gzip\r\n'
+        f'Content-Length: 0\r\n'
+        f'\r\n'
+    ).encode()
+
+    reader = writer = None
+    while time.perf_counter() < deadline:
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            status, keep_alive = await read_response(reader)
+            latencies.append(time.perf_counter() - start)
+            if status >= 400:
+                errors[status] = errors.get(status, 0) + 1
+            if not keep_alive:
+                writer.close()
+                writer = None
+        except (OSError, ConnectionError, asyncio.IncompleteReadError, ValueError):
+            errors['connection'] = errors.get('connection', 0) + 1
+            if writer is not None:
+                writer.close()
+            writer = None
+            await asyncio.sleep(0.05)
+    if writer is not None:
+        writer.close()
+
+
+def percentile(values, fraction):
+    if not values:
+        return float('nan')
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+async def run(target, method, path, access_token, concurrency, duration):
+    url = urlsplit(target)
+    latencies, errors = [], {}
+    started = time.perf_counter()
+    deadline = started + duration
+    await asyncio.gather(*(
+        connection_loop(url, method, path, access_token, deadline, latencies, errors)
+        for _ in range(concurrency)
+    ))
+    elapsed = time.perf_counter() - started
+    latencies.sort()
+    return len(latencies) / elapsed, percentile(latencies, 0.5), percentile(latencies, 0.99), errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--target', action='append', required=True,
+                        help='name=base URL of a deployment, repeatable (e.g. wsgi=http://127.0.0.1:8000)')
+    parser.add_argument('--access-token', required=True, help='Value of the access_token cookie')
+    parser.add_argument('--concurrency', type=int, default=300, help='Open connections per endpoint')
+    parser.add_argument('--duration', type=float, default=30, help='Seconds per endpoint and target')
+    parser.add_argument('--endpoint', action='append', default=None,
+                        help='METHOD:/path to test instead of the default endpoints, repeatable')
+    args = parser.parse_args()
+
+    endpoints = [tuple(value.split(':', 1)) for value in args.endpoint] if args.endpoint else ENDPOINTS
+    print(f'{"target":<8} {"endpoint":<24} {"req/s":>9} {"p50 ms":>9} {"p99 ms":>9}  errors')
+    for target in args.target:
+        name, _, base_url = target.partition('=')
+        for method, path in endpoints:
+            rps, p50, p99, errors = asyncio.run(
+                run(base_url.rstrip('/'), method, path, args.access_token, args.concurrency, args.duration)
+            )
+            print(f'{name:<8} {method + " " + path:<24} {rps:9.0f} {p50 * 1000:9.1f} {p99 * 1000:9.1f}  '
+                  f'{errors or "-"}')
+
+
+if __name__ == '__main__':
+    main()
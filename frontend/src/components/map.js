@@ -7,6 +7,7 @@ import 'leaflet/dist/leaflet.css';
 import markerIcon2x from 'leaflet/dist/images/marker-icon-2x.png';
 import markerIcon from 'leaflet/dist/images/marker-icon.png';
 import markerShadow from 'leaflet/dist/images/marker-shadow.png';
+import { fetchRouteData } from '../routes/endpoints/api';
 
 // Fix Leaflet marker icon paths ONCE
 const setupLeafletIcons = () => {
@@ -95,23 +96,14 @@ const LeafletMap = forwardRef(({
     }
   }, []);
 
-  // Function to fetch route from OSRM
+  // Function to fetch route from the backend router
   const fetchRoute = async (start, end) => {
     console.log('Fetching route from', start, 'to', end);
     setIsLoadingRoute(true);
     setRouteError(null);
     
     try {
-      // Using OSRM (free routing service)
-      const response = await fetch(
-        `https://router.project-osrm.org/route/v1/driving/${start[1]},${start[0]};${end[1]},${end[0]}?overview=full&geometries=geojson`
-      );
-      
-      if (!response.ok) {
-        throw new Error('Failed to fetch route');
-      }
-      
-      const data = await response.json();
+      const data = await fetchRouteData(start, end);
       
       if (data.routes && data.routes.length > 0) {
         const coordinates = data.routes[0].geometry.coordinates.map(coord => [coord[1], coord[0]]);
@@ -13,6 +13,8 @@ const DELETE_USER_URL = `${BASE_URL}delete/`
 const ADD_FAVORITES_URL = `${BASE_URL}add/`
 const REMOVE_FAVORITES_URL = `${BASE_URL}remove/`
 const LIST_FAVORITES_URL = `${BASE_URL}list/`
+const ROUTE_URL = `${BASE_URL}route/`
+const OSRM_ROUTE_URL = 'https://router.project-osrm.org/route/v1/driving/'
 
 export const login = async (username, password) => {
     const response = await axios.post(LOGIN_URL,
@@ -202,3 +204,35 @@ export const listFavorites = async () => {
         return null;
     }
 };
+
+// start/end are [lat, lng]; the backend answers in OSRM's response format.
+// Without a street graph on the server (503) or when it cannot be reached,
+// the public OSRM server is asked instead.
+export const fetchRouteData = async (start, end) => {
+    try {
+        const response = await axios.get(ROUTE_URL, {
+            params: {
+                from: `${start[1]},${start[0]}`,
+                to: `${end[1]},${end[0]}`
+            },
+            withCredentials: true,
+            timeout: 10000
+        });
+        return response.data;
+    } catch (error) {
+        if (error.response && error.response.status !== 503) {
+            throw error;
+        }
+        return fetchOsrmRouteData(start, end);
+    }
+};
+
+const fetchOsrmRouteData = async (start, end) => {
+    const response = await fetch(
+        `${OSRM_ROUTE_URL}${start[1]},${start[0]};${end[1]},${end[0]}?overview=full&geometries=geojson`
+    );
+    if (!response.ok) {
+        throw new Error('Failed to fetch route');
+    }
+    return response.json();
+};